@@ -87,13 +87,23 @@ LAST UPDATED: February 2026
 # IMPORTS AND INITIALIZATION
 # ============================================================================
 
-# Eventlet must be patched first for async Socket.IO support
-import eventlet
-eventlet.monkey_patch()
+# Eventlet must be patched first for async Socket.IO support.
+# Skipped for non-web entrypoints (migrations, shells, offline scripts —
+# set STUDYVERSE_RUNTIME=cli) so tooling imports stay fast and unpatched:
+# monkey_patch() replaces socket/threading/select/ssl process-wide.
+import os
+if os.getenv('STUDYVERSE_RUNTIME', 'web') == 'web':
+    import eventlet
+    eventlet.monkey_patch()
 
 # Database and ORM imports
-from sqlalchemy.pool import NullPool
-from flask import Flask, render_template, request, session, redirect, url_for, Response, flash, jsonify
+from sqlalchemy import bindparam, case, delete, event, func, insert, inspect as sa_inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from flask import Flask, render_template, request, session, redirect, url_for, Response, flash, jsonify, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
 from flask_socketio import SocketIO, join_room, emit
@@ -106,33 +116,87 @@ from authlib.integrations.flask_client import OAuth
 
 # Utilities
 import base64
+import collections
+import functools
+import hashlib
+import hmac
+import threading
+import importlib.util
 import io
 import json
+import logging
+import queue
 import os
+
+# orjson (Rust-backed JSON) serializes small dicts several times faster than
+# stdlib json; degrade gracefully to json.dumps when it isn't installed.
+try:
+    import orjson
+
+    def _json_dumps_bytes(obj):
+        return orjson.dumps(obj)
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _json_dumps_bytes(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def _json_loads(data):
+        return json.loads(data)
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from pytz import timezone, utc
 import sys
 import time
 import re
+import string
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
 
 # Groq Client for Personal AI Secretary
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
+# Only check that the SDK is installed here — the actual import happens
+# lazily in _get_groq_client() so cold starts don't pay for loading it.
+GROQ_AVAILABLE = importlib.util.find_spec('groq') is not None
 
 # Load environment variables from .env file for configuration
 load_dotenv()
 
+# Optional Redis — used for cross-worker counters and caches when REDIS_URL
+# is configured. Everything that uses it degrades to an in-process or DB
+# fallback when Redis is absent, so dev setups need nothing extra.
+try:
+    import redis as _redis_lib
+except ImportError:
+    _redis_lib = None
+
+
+@functools.cache
+def get_redis():
+    """Shared Redis client, or None when Redis isn't configured/installed."""
+    url = os.getenv('REDIS_URL')
+    if not url or _redis_lib is None:
+        return None
+    try:
+        client = _redis_lib.Redis.from_url(
+            url, socket_timeout=2, socket_connect_timeout=2
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"Failed to connect to Redis: {e}")
+        return None
+
 # ============================================================================
 # SIGNUP VALIDATION HELPERS
 # ============================================================================
 
 # --- Profanity Filter ---
 # A curated list of common bad words / slang to block in user names.
-_PROFANITY_LIST = [
+# Stored as a tuple: it is only ever iterated (automaton/Bloom construction),
+# and an immutable sequence is more compact and faster to walk than a list.
+_PROFANITY_LIST_RAW = (
     'fuck', 'shit', 'bitch', 'asshole', 'bastard', 'cunt', 'dick', 'pussy',
     'cock', 'whore', 'slut', 'nigger', 'nigga', 'faggot', 'retard', 'idiot',
     'stupid', 'moron', 'dumbass', 'jackass', 'prick', 'wanker', 'twat',
@@ -142,7 +206,13 @@ _PROFANITY_LIST = [
     'admin', 'moderator', 'studyverse', 'support', 'official',
     'fuk', 'fck', 'fucc', 'fvck', 'phuck', 'sht', 'shyt', 'biatch',
     'bytch', 'b1tch', 'btch', 'azz', 'a55', 'a$$',
-]
+)
+
+# Shortest words first: short patterns ('ass', 'sex', ...) match by far the
+# most often, so any consumer that scans the list linearly short-circuits
+# sooner. The automaton itself is order-independent, but a sorted source
+# also makes the trie construction deterministic and easy to diff.
+_PROFANITY_LIST = tuple(sorted(_PROFANITY_LIST_RAW, key=len))
 
 # Leet speak / symbol substitution map
 # Converts tricks like f*ck → fuck, sh!t → shit, b!tch → bitch, @ss → ass
@@ -156,32 +226,171 @@ _LEET_MAP = str.maketrans({
     '"': '',   '/': '',   '\\': '',  '|': 'i',  '<': 'c',
     '>': '',   '[': '',   ']': '',   '{': '',   '}': '',
 })
+# Fold uppercase → lowercase into the same table so normalization is a
+# single C-level translate pass instead of .lower() + .translate().
+_LEET_MAP.update({ord(c): ord(c.lower()) for c in string.ascii_uppercase})
 
+@functools.lru_cache(maxsize=1024)
 def _normalize_leet(text: str) -> str:
     """
     Normalize leet speak and symbol substitutions.
     e.g.  'f*ck' → 'fck', 'sh!t' → 'shit', 'b!tch' → 'bitch', '@ss' → 'ass'
     """
-    return text.lower().translate(_LEET_MAP)
+    return text.translate(_LEET_MAP)
+
+
+class _AhoCorasick:
+    """
+    Minimal Aho-Corasick automaton for multi-pattern substring search.
+
+    Built once at import time from _PROFANITY_LIST. Scanning is a single
+    O(len(text)) pass no matter how many patterns are loaded, instead of
+    one `in` scan per word (O(words × len(text))).
+    """
+
+    def __init__(self, patterns):
+        self._goto   = [{}]      # node index -> {char: next node index}
+        self._fail   = [0]       # node index -> failure link node index
+        self._output = [False]   # node index -> does any pattern end here?
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern):
+        """Insert one pattern into the trie."""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(False)
+                nxt = len(self._goto) - 1
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._output[node] = True
+
+    def _build_failure_links(self):
+        """BFS over the trie to wire up failure links (classic construction)."""
+        from collections import deque
+        queue = deque(self._goto[0].values())  # root children keep fail=0
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit matches from the suffix node
+                self._output[nxt] = self._output[nxt] or self._output[self._fail[nxt]]
+
+    def search(self, text):
+        """Return True as soon as any pattern occurs anywhere in text."""
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                return True
+        return False
+
+
+# Compile the profanity list into an automaton once at import time
+_PROFANITY_AC = _AhoCorasick(_PROFANITY_LIST)
+
+
+# --- Bloom-Filter Fast Reject ---
+# Most names contain zero profanity; a Bloom filter over the 3-grams of the
+# blocked words lets the common clean-name case bail out after a few hash
+# probes instead of paying for the full automaton walk.
+_BLOOM_SIZE = 8192            # bits; bitmask stored as one Python int
+_BLOOM_MASK = _BLOOM_SIZE - 1
+
+
+def _bloom_hashes(gram: str):
+    """Two cheap independent hashes (FNV-1a + djb2) of a 3-gram."""
+    h1 = 2166136261          # FNV-1a offset basis
+    h2 = 5381                # djb2 seed
+    for ch in gram:
+        c = ord(ch)
+        h1 = ((h1 ^ c) * 16777619) & 0xFFFFFFFF
+        h2 = (h2 * 33 + c) & 0xFFFFFFFF
+    return h1 & _BLOOM_MASK, h2 & _BLOOM_MASK
+
+
+def _build_profanity_bloom() -> int:
+    """Insert every 3-gram of every blocked word into the filter."""
+    bits = 0
+    for word in _PROFANITY_LIST:
+        for i in range(len(word) - 2):
+            b1, b2 = _bloom_hashes(word[i:i + 3])
+            bits |= (1 << b1) | (1 << b2)
+    return bits
 
+
+_PROFANITY_BLOOM = _build_profanity_bloom()
+
+
+def _bloom_might_contain(text: str) -> bool:
+    """
+    Probe the Bloom filter with every 3-gram of text.
+    False means definitely clean; True means "maybe", so run the full scan.
+    (All blocked words are >= 3 chars, so a miss here is never a false negative.)
+
+    The loop walks the UTF-8 bytes with both hashes inlined (no slicing or
+    per-trigram calls), and only computes the second hash when the first
+    probe hits — the blocked words are pure ASCII, so byte-level trigrams
+    match the char-level trigrams inserted at build time.
+    """
+    buf = text.encode('utf-8')
+    n = len(buf)
+    if n < 3:
+        return False
+    bloom = _PROFANITY_BLOOM
+    mask = _BLOOM_MASK
+    for i in range(n - 2):
+        a, b, c = buf[i], buf[i + 1], buf[i + 2]
+        # FNV-1a over the trigram
+        h1 = ((2166136261 ^ a) * 16777619) & 0xFFFFFFFF
+        h1 = ((h1 ^ b) * 16777619) & 0xFFFFFFFF
+        h1 = ((h1 ^ c) * 16777619) & 0xFFFFFFFF
+        if not (bloom >> (h1 & mask)) & 1:
+            continue
+        # djb2, only when the first probe passed
+        h2 = (((5381 * 33 + a) * 33 + b) * 33 + c) & 0xFFFFFFFF
+        if (bloom >> (h2 & mask)) & 1:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=4096)
 def contains_profanity(text: str) -> bool:
     """
     Check if text contains any profanity or bad words.
     Checks both the raw text AND the leet-speak-normalized version
     so tricks like f*ck, sh!t, b1tch, @sshole are all caught.
+
+    Both versions are scanned in one automaton walk by joining them with
+    a NUL byte (which never appears in any pattern, so no false matches
+    can span the boundary).
     """
     if not text:
         return False
     raw   = text.lower().strip()
     clean = _normalize_leet(raw)       # leet-decoded version
-    for word in _PROFANITY_LIST:
-        if word in raw or word in clean:
-            return True
-    return False
+    fused = raw + '\x00' + clean
+    # Bloom fast path: if no trigram of the input can belong to a blocked
+    # word, skip the automaton walk entirely.
+    if not _bloom_might_contain(fused):
+        return False
+    return _PROFANITY_AC.search(fused)
 
 
 # --- Disposable / Fake Email Domain Blocklist ---
-_BLOCKED_EMAIL_DOMAINS = {
+_BLOCKED_EMAIL_DOMAINS = frozenset({
     'mailinator.com', 'guerrillamail.com', 'tempmail.com', 'throwam.com',
     'yopmail.com', 'trashmail.com', 'sharklasers.com', 'guerrillamailblock.com',
     'grr.la', 'guerrillamail.info', 'spam4.me', 'bccto.me', 'chacuo.net',
@@ -205,16 +414,50 @@ _BLOCKED_EMAIL_DOMAINS = {
     'xagloo.com', 'xemaps.com', 'xents.com', 'xmaily.com', 'xoxy.net',
     'ypmail.webarnak.fr.eu.org', 'yuurok.com', 'z1p.biz', 'za.com',
     'zippymail.info', 'zoemail.net', 'zoemail.org', 'zomg.info',
-}
+})
+
+
+# Signup validation patterns, compiled once at import instead of per
+# request inside the signup handler
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$')
+_PW_UPPER_RE = re.compile(r"[A-Z]")
+_PW_DIGIT_RE = re.compile(r"[0-9]")
+_PW_SPECIAL_RE = re.compile(r"[!@#$%^&*(),.?\":{}|<>]")
 
 
 def is_blocked_email_domain(email: str) -> bool:
-    """Check if the email domain is a known disposable/fake domain."""
+    """
+    Check if the email domain is a known disposable/fake domain.
+    Walks every parent suffix of the domain so subdomain tricks like
+    foo.mailinator.com are caught too, in O(labels) set lookups.
+    """
     try:
         domain = email.strip().lower().split('@')[1]
-        return domain in _BLOCKED_EMAIL_DOMAINS
     except (IndexError, AttributeError):
         return True  # Malformed email
+    parts = domain.split('.')
+    for i in range(len(parts) - 1):
+        if '.'.join(parts[i:]) in _BLOCKED_EMAIL_DOMAINS:
+            return True
+    return False
+
+
+# Shared DNS resolver + TTL cache for MX lookups.
+# One Resolver instance avoids re-reading /etc/resolv.conf per query, and
+# the cache means repeat signups from common domains (gmail.com,
+# outlook.com, ...) never hit the network again within the TTL.
+_MX_CACHE = {}               # domain -> (expires_at, has_mx)
+_MX_CACHE_MAX = 10000
+_MX_CACHE_TTL_OK = 3600      # cache positive results for 1 hour
+_MX_CACHE_TTL_FAIL = 300     # cache failures briefly (could be a transient timeout)
+_MX_RESOLVER = None          # created lazily on first lookup
+
+# Major providers that obviously receive mail — covers the vast majority
+# of real signups without ever touching DNS
+_WELL_KNOWN_MX = frozenset({
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com',
+    'yahoo.com', 'icloud.com', 'protonmail.com', 'proton.me', 'aol.com',
+})
 
 
 def email_domain_has_mx(email: str) -> bool:
@@ -222,15 +465,60 @@ def email_domain_has_mx(email: str) -> bool:
     Check if the email domain has valid MX (Mail eXchange) DNS records.
     Uses dnspython to query DNS — catches fake domains like abc@notrealdomain123.com.
     Returns True if valid, False if the domain cannot receive emails.
+    Results are cached per-domain so repeat signups skip the network round trip.
     """
+    global _MX_RESOLVER
     try:
-        import dns.resolver
         domain = email.strip().lower().split('@')[1]
-        answers = dns.resolver.resolve(domain, 'MX', lifetime=5)
-        return len(answers) > 0
+    except (IndexError, AttributeError):
+        return False
+
+    if domain in _WELL_KNOWN_MX:
+        return True
+
+    now = time.monotonic()
+    cached = _MX_CACHE.get(domain)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    try:
+        if _MX_RESOLVER is None:
+            import dns.resolver
+            _MX_RESOLVER = dns.resolver.Resolver()
+            _MX_RESOLVER.timeout = 2    # per-nameserver try
+            _MX_RESOLVER.lifetime = 2.5  # fail fast; cached afterwards either way
+            _MX_RESOLVER.use_edns(0)    # EDNS0: larger UDP payloads, fewer TCP retries
+        answers = _MX_RESOLVER.resolve(domain, 'MX')
+        has_mx = len(answers) > 0
     except Exception:
         # If DNS lookup fails (NXDOMAIN, timeout, etc.) → domain is invalid/fake
-        return False
+        has_mx = False
+
+    if len(_MX_CACHE) >= _MX_CACHE_MAX:
+        _MX_CACHE.clear()  # crude eviction, keeps the cache bounded
+    ttl = _MX_CACHE_TTL_OK if has_mx else _MX_CACHE_TTL_FAIL
+    _MX_CACHE[domain] = (now + ttl, has_mx)
+    return has_mx
+
+
+def email_domains_have_mx_batch(emails):
+    """
+    Validate many email domains concurrently (bulk flows like admin imports).
+    DNS is latency-bound, so N serial lookups of ~50ms each collapse to
+    roughly one round trip when fanned out; repeated domains are answered
+    from the cache inside email_domain_has_mx.
+
+    Returns:
+        dict: {email: has_mx} in the same order the emails were given.
+    """
+    emails = list(emails)
+    # The OTP executor is reused here — both workloads are small, bursty
+    # and I/O bound, and one bounded pool is easier to reason about.
+    return dict(zip(emails, _EMAIL_EXECUTOR.map(email_domain_has_mx, emails)))
+
+
+# Compiled once at import; \Z instead of $ so a trailing newline can't sneak past
+_NAME_RE = re.compile(r"^[A-Za-z\s\-']+\Z")
 
 
 def validate_name_field(name: str, field_label: str) -> str:
@@ -245,13 +533,106 @@ def validate_name_field(name: str, field_label: str) -> str:
         return f'{field_label} must be at least 2 characters.'
     if len(name) > 50:
         return f'{field_label} must be at most 50 characters.'
-    if not re.match(r"^[A-Za-z\s\-\']+$", name):
+    if not _NAME_RE.match(name):
         return f'{field_label} can only contain letters, spaces, hyphens, and apostrophes.'
     if contains_profanity(name):
         return f'{field_label} contains inappropriate language. Please use your real name.'
     return ''
 
 
+# OTP email HTML, pre-built once at import time; send_otp_email only fills
+# in the two per-send fields instead of rebuilding the ~2 KB body.
+_OTP_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head><meta charset="UTF-8"></head>
+<body style="margin:0;padding:0;background:#0f0f0f;font-family:'Segoe UI',sans-serif;">
+  <table width="100%" cellpadding="0" cellspacing="0" style="background:#0f0f0f;padding:40px 0;">
+    <tr><td align="center">
+      <table width="480" cellpadding="0" cellspacing="0"
+             style="background:#1a1a2e;border-radius:20px;border:1px solid rgba(255,255,255,0.08);overflow:hidden;">
+        <!-- Header -->
+        <tr>
+          <td align="center" style="padding:36px 40px 24px;background:linear-gradient(135deg,#0ea5e9,#6366f1);">
+            <div style="font-size:2.4rem;">🎓</div>
+            <h1 style="color:white;margin:8px 0 0;font-size:1.6rem;font-weight:700;letter-spacing:-0.5px;">StudyVerse</h1>
+            <p style="color:rgba(255,255,255,0.8);margin:4px 0 0;font-size:0.9rem;">Email Verification</p>
+          </td>
+        </tr>
+        <!-- Body -->
+        <tr>
+          <td style="padding:36px 40px;">
+            <p style="color:#e2e8f0;font-size:1rem;margin:0 0 8px;">Hey <strong>{first_name}</strong> 👋</p>
+            <p style="color:#94a3b8;font-size:0.95rem;margin:0 0 28px;line-height:1.6;">
+              Thanks for joining StudyVerse! Use the verification code below to confirm your email address.
+              This code expires in <strong style="color:#f59e0b;">10 minutes</strong>.
+            </p>
+            <!-- OTP Box -->
+            <div style="background:#0f172a;border:2px solid #0ea5e9;border-radius:16px;padding:28px;text-align:center;margin-bottom:28px;">
+              <p style="color:#64748b;font-size:0.8rem;margin:0 0 12px;text-transform:uppercase;letter-spacing:2px;">Your Verification Code</p>
+              <div style="font-size:3rem;font-weight:800;letter-spacing:12px;color:#0ea5e9;font-family:monospace;">{otp_code}</div>
+            </div>
+            <p style="color:#64748b;font-size:0.82rem;margin:0;line-height:1.6;">
+              ⚠️ Never share this code with anyone. StudyVerse will never ask for it.<br>
+              If you didn't request this, you can safely ignore this email.
+            </p>
+          </td>
+        </tr>
+        <!-- Footer -->
+        <tr>
+          <td style="padding:20px 40px;border-top:1px solid rgba(255,255,255,0.06);text-align:center;">
+            <p style="color:#475569;font-size:0.75rem;margin:0;">© 2026 StudyVerse · AI-Powered Study Companion</p>
+          </td>
+        </tr>
+      </table>
+    </td></tr>
+  </table>
+</body>
+</html>
+"""
+
+
+# Background executor for OTP emails — the SendGrid POST (network RTT +
+# TLS handshake) should never hold up the user-facing signup response.
+# Eventlet's monkey patching makes the submitted requests call cooperative.
+_EMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='otp-email')
+
+
+def _log_otp_send_result(fut):
+    """Done-callback for fire-and-forget OTP sends: a failure can't reach
+    the user (their response already went out), so at least leave a trace
+    in the logs instead of swallowing it inside the executor."""
+    try:
+        if not fut.result():
+            print("Background OTP email send failed (SendGrid rejected)")
+    except Exception as e:
+        print(f"Background OTP email send raised: {e}")
+
+# Persistent session for SendGrid: reuses the TLS connection to
+# api.sendgrid.com across sends (saves DNS + TCP + TLS handshake, often
+# 150-400ms per email) and retries transient failures with backoff.
+_SENDGRID_SESSION = requests.Session()
+_SENDGRID_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+))
+
+# Same idea for outbound AI calls (Groq, Gemini REST, syllabus extraction):
+# every chat message used to pay a fresh TLS handshake to the same few
+# hosts. One pooled session keeps those connections warm.
+_AI_SESSION = requests.Session()
+_AI_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+))
+
+# Races fallback Groq keys in parallel when the primary is rate-limited
+# (see call_nova_api); sized for the handful of configured keys.
+_GROQ_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='groq')
+
+
 def send_otp_email(to_email: str, otp_code: str, first_name: str) -> bool:
     """
     Send a 6-digit OTP verification email via SendGrid HTTP API.
@@ -267,68 +648,24 @@ def send_otp_email(to_email: str, otp_code: str, first_name: str) -> bool:
         return False
 
 
-    html_body = f"""
-    <!DOCTYPE html>
-    <html>
-    <head><meta charset="UTF-8"></head>
-    <body style="margin:0;padding:0;background:#0f0f0f;font-family:'Segoe UI',sans-serif;">
-      <table width="100%" cellpadding="0" cellspacing="0" style="background:#0f0f0f;padding:40px 0;">
-        <tr><td align="center">
-          <table width="480" cellpadding="0" cellspacing="0"
-                 style="background:#1a1a2e;border-radius:20px;border:1px solid rgba(255,255,255,0.08);overflow:hidden;">
-            <!-- Header -->
-            <tr>
-              <td align="center" style="padding:36px 40px 24px;background:linear-gradient(135deg,#0ea5e9,#6366f1);">
-                <div style="font-size:2.4rem;">🎓</div>
-                <h1 style="color:white;margin:8px 0 0;font-size:1.6rem;font-weight:700;letter-spacing:-0.5px;">StudyVerse</h1>
-                <p style="color:rgba(255,255,255,0.8);margin:4px 0 0;font-size:0.9rem;">Email Verification</p>
-              </td>
-            </tr>
-            <!-- Body -->
-            <tr>
-              <td style="padding:36px 40px;">
-                <p style="color:#e2e8f0;font-size:1rem;margin:0 0 8px;">Hey <strong>{first_name}</strong> 👋</p>
-                <p style="color:#94a3b8;font-size:0.95rem;margin:0 0 28px;line-height:1.6;">
-                  Thanks for joining StudyVerse! Use the verification code below to confirm your email address.
-                  This code expires in <strong style="color:#f59e0b;">10 minutes</strong>.
-                </p>
-                <!-- OTP Box -->
-                <div style="background:#0f172a;border:2px solid #0ea5e9;border-radius:16px;padding:28px;text-align:center;margin-bottom:28px;">
-                  <p style="color:#64748b;font-size:0.8rem;margin:0 0 12px;text-transform:uppercase;letter-spacing:2px;">Your Verification Code</p>
-                  <div style="font-size:3rem;font-weight:800;letter-spacing:12px;color:#0ea5e9;font-family:monospace;">{otp_code}</div>
-                </div>
-                <p style="color:#64748b;font-size:0.82rem;margin:0;line-height:1.6;">
-                  ⚠️ Never share this code with anyone. StudyVerse will never ask for it.<br>
-                  If you didn't request this, you can safely ignore this email.
-                </p>
-              </td>
-            </tr>
-            <!-- Footer -->
-            <tr>
-              <td style="padding:20px 40px;border-top:1px solid rgba(255,255,255,0.06);text-align:center;">
-                <p style="color:#475569;font-size:0.75rem;margin:0;">© 2026 StudyVerse · AI-Powered Study Companion</p>
-              </td>
-            </tr>
-          </table>
-        </td></tr>
-      </table>
-    </body>
-    </html>
-    """
+    html_body = _OTP_HTML_TEMPLATE.format(first_name=first_name, otp_code=otp_code)
 
     try:
-        response = requests.post(
+        # Serialize with orjson (when available) and send pre-encoded bytes —
+        # skips requests' internal json.dumps for the nested payload.
+        payload = _json_dumps_bytes({
+            'personalizations': [{'to': [{'email': to_email}]}],
+            'from':    {'email': SENDER_EMAIL, 'name': SENDER_NAME},
+            'subject': f'{otp_code} is your StudyVerse verification code',
+            'content': [{'type': 'text/html', 'value': html_body}],
+        })
+        response = _SENDGRID_SESSION.post(
             'https://api.sendgrid.com/v3/mail/send',
             headers={
                 'Authorization': f'Bearer {SENDGRID_API_KEY}',
                 'Content-Type':  'application/json',
             },
-            json={
-                'personalizations': [{'to': [{'email': to_email}]}],
-                'from':    {'email': SENDER_EMAIL, 'name': SENDER_NAME},
-                'subject': f'{otp_code} is your StudyVerse verification code',
-                'content': [{'type': 'text/html', 'value': html_body}],
-            },
+            data=payload,
             timeout=10
         )
         # SendGrid returns 202 Accepted on success
@@ -356,12 +693,11 @@ def send_otp_email(to_email: str, otp_code: str, first_name: str) -> bool:
 if not os.getenv("AI_API_KEY"):
     pass  # Application will work without AI features if key is missing
 
-# Try to import Google Generative AI library for quiz generation and chat
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False  # Graceful degradation if library not installed
+# Google Generative AI library for quiz generation and chat.
+# Availability is detected without importing (find_spec just reads package
+# metadata); the heavyweight import is deferred to _genai() on first AI call,
+# which shrinks cold-start time and RSS on Render dynos.
+GEMINI_AVAILABLE = importlib.util.find_spec('google.generativeai') is not None
 
 # ============================================================================
 # FLASK APPLICATION INITIALIZATION
@@ -374,13 +710,19 @@ from whitenoise import WhiteNoise
 
 app = Flask(__name__)
 
+# Quiet the app logger in production: DEBUG-level lines in the hot auth
+# paths format and write only when FLASK_DEBUG is on, instead of pushing
+# f-strings through stdout on every request.
+app.logger.setLevel(logging.DEBUG if app.debug else logging.WARNING)
+
+# IST offset from UTC, built once — the filter below runs per timestamp cell
+# in leaderboard/chat templates, so avoid re-allocating a timedelta each call
+_IST_OFFSET = timedelta(hours=5, minutes=30)
+
 # Template filter to convert UTC to IST
 @app.template_filter('to_ist')
 def to_ist_filter(dt):
-    if dt:
-        from datetime import timedelta
-        return dt + timedelta(hours=5, minutes=30)
-    return dt
+    return dt + _IST_OFFSET if dt else dt
 # ProxyFix: Critical for deployment on Render/Heroku behind reverse proxy
 # Ensures correct handling of HTTPS, host headers, and client IP addresses
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
@@ -409,12 +751,32 @@ app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable modification tracking to save memory
 
 # Connection Pool Settings for Cloud PostgreSQL
-# NullPool: Disables connection pooling to prevent "un-acquired lock" errors with eventlet
-# pool_pre_ping: Tests connections before use to handle dropped connections
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'poolclass': NullPool,      # No connection pooling (eventlet compatibility)
-    'pool_pre_ping': True,      # Validate connections before use
-}
+# A small QueuePool amortizes the connection cost (TLS handshake + auth,
+# ~30-100ms against cloud Postgres) over many requests. Eventlet monkey-
+# patches the driver's sockets, so pooled connections stay cooperative.
+# pool_recycle guards against the server silently dropping idle connections.
+# (SQLite dev databases keep SQLAlchemy's defaults — sizing options don't
+# apply to its pool classes.)
+if database_url.startswith('postgresql'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 10,            # Steady-state connections kept open
+        'max_overflow': 20,         # Burst headroom under load
+        'pool_timeout': 10,         # Fail a checkout fast instead of queueing 30s
+        'pool_recycle': 1800,       # Recycle connections older than 30 min
+        'pool_pre_ping': True,      # Validate connections before use
+        # Extend psycopg2 batching beyond INSERTs to UPDATE/DELETE
+        # executemany (bulk XP settlements etc.)
+        'executemany_mode': 'values_plus_batch',
+        # Statement-compilation cache headroom: the app issues well over the
+        # default 500 distinct statement shapes (per-model CRUD + the admin
+        # panel), so raise it to keep hot auth queries compiled-cached
+        'query_cache_size': 1200,
+    }
+else:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,      # Validate connections before use
+        'query_cache_size': 1200,
+    }
 
 # File upload configuration for profile images and syllabus PDFs
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
@@ -504,22 +866,31 @@ GROQ_KEYS = [
 # Filter out None or empty strings
 GROQ_KEYS = [k for k in GROQ_KEYS if k]
 
-# Initialize Groq client (using first available key for general tasks)
-if GROQ_AVAILABLE and GROQ_KEYS:
+# Lazy Groq client accessor (using first available key for general tasks).
+# The SDK import and client construction happen once, on first call.
+@functools.cache
+def _get_groq_client():
+    if not (GROQ_AVAILABLE and GROQ_KEYS):
+        return None
     try:
-        groq_client = Groq(api_key=GROQ_KEYS[0])
+        from groq import Groq
+        return Groq(api_key=GROQ_KEYS[0])
     except Exception as e:
         print(f"Failed to configure Groq: {e}")
-        groq_client = None
-else:
-    groq_client = None
+        return None
 
-# Configure Gemini API if available
-if GEMINI_AVAILABLE and AI_API_KEY:
-    try:
-        genai.configure(api_key=AI_API_KEY)
-    except Exception as e:
-        print(f"Failed to configure Gemini: {e}")
+
+# Lazy Gemini accessor — imports and configures google.generativeai on the
+# first AI call instead of at worker boot.
+@functools.cache
+def _genai():
+    import google.generativeai as genai
+    if AI_API_KEY:
+        try:
+            genai.configure(api_key=AI_API_KEY)
+        except Exception as e:
+            print(f"Failed to configure Gemini: {e}")
+    return genai
 
 # ============================================================================
 # TIMEZONE CONFIGURATION
@@ -528,28 +899,33 @@ if GEMINI_AVAILABLE and AI_API_KEY:
 # Indian Standard Time (IST) timezone for displaying times to users
 IST = timezone('Asia/Kolkata')
 
-def to_ist_time(utc_datetime):
+@functools.lru_cache(maxsize=4096)
+def to_ist_time(utc_datetime, _offset=_IST_OFFSET, _ist=IST):
     """
     Convert UTC datetime to IST and return formatted 12-hour time string.
-    
+
+    Cached: leaderboards and chat logs render many rows sharing the same
+    timestamps, and astimezone + strftime are expensive relative to an LRU hit.
+    The hot constants are bound as default args at definition time so a cache
+    miss does local loads instead of global lookups.
+
     Args:
         utc_datetime: datetime object in UTC timezone
-    
+
     Returns:
         str: Formatted time string in 12-hour format (e.g., "02:30 PM")
     """
     if not utc_datetime:
         return ""
-    
-    # Ensure datetime is timezone-aware (UTC)
+
+    # Fast path: naive timestamps are UTC by convention (datetime.utcnow
+    # everywhere in the models), so a plain timedelta add gives IST without
+    # pytz's localize/astimezone machinery.
     if utc_datetime.tzinfo is None:
-        utc_datetime = utc.localize(utc_datetime)
-    
-    # Convert to IST
-    ist_datetime = utc_datetime.astimezone(IST)
-    
-    # Format as 12-hour time with AM/PM
-    return ist_datetime.strftime('%I:%M %p')
+        return (utc_datetime + _offset).strftime('%I:%M %p')
+
+    # Aware datetimes still go through a proper timezone conversion
+    return utc_datetime.astimezone(_ist).strftime('%I:%M %p')
 
 # ============================================================================
 # DATABASE AND SERVICE INITIALIZATION
@@ -594,6 +970,21 @@ app.jinja_env.globals.update(
 # Each class maps to a table, and each attribute maps to a column
 # Benefits: Type safety, relationship management, query abstraction, database independence
 
+# Bound .format of the UI Avatars URL — one call formats the whole URL
+# instead of building it from f-string pieces per row
+_AVATAR_TMPL = "https://ui-avatars.com/api/?name={}&background=0ea5e9&color=fff&size={}".format
+
+
+@functools.lru_cache(maxsize=4096)
+def _avatar_url(initials, size):
+    """
+    Generated-avatar URL for a set of initials. Cached because real name
+    distributions repeat initials heavily ('AS', 'JK'), so most list rows
+    get the finished string back without reformatting.
+    """
+    return _AVATAR_TMPL(initials, size)
+
+
 class User(UserMixin, db.Model):
     """
     User Model - Core entity representing a StudyVerse user
@@ -657,37 +1048,91 @@ class User(UserMixin, db.Model):
     current_streak = db.Column(db.Integer, default=0)  # Current daily activity streak
     longest_streak = db.Column(db.Integer, default=0)  # Best streak record
     last_activity_date = db.Column(db.Date, nullable=True)  # For streak tracking
-    
-    @property
+
+    # Daily focus-XP cap tracking, denormalized onto the user row so the cap
+    # check in add_xp is a column read instead of an XPHistory SUM aggregate
+    daily_focus_xp = db.Column(db.Integer, default=0)  # Focus XP earned today
+    daily_focus_xp_date = db.Column(db.Date, nullable=True)  # Day the counter belongs to
+
+    # Bitset of canonical badges already earned (bit layout in
+    # GamificationService.BADGE_BITS) — lets check_badges skip all badge
+    # SQL once a badge is known to be held
+    earned_badge_mask = db.Column(db.BigInteger, default=0)
+
+    # Denormalized rank display fields, kept in step with total_xp by the
+    # _sync_rank_columns event listener below the service classes. Reads
+    # come straight off the row; nothing recomputes the rank at render time.
+    # (Python attrs carry a _col suffix because rank_name etc. are taken by
+    # the compatibility properties.)
+    rank_name_col = db.Column('rank_name', db.String(20), nullable=True)
+    rank_icon_col = db.Column('rank_icon', db.String(40), nullable=True)
+    rank_color_col = db.Column('rank_color', db.String(10), nullable=True)
+
+    # Expression index backing the case-insensitive duplicate-name check in
+    # signup — without it lower(first_name)/lower(last_name) forces a
+    # sequential scan
+    __table_args__ = (
+        db.Index('ix_user_name_lower', db.func.lower(first_name), db.func.lower(last_name)),
+    )
+
+    @functools.cached_property
     def rank_info(self):
         """
         Computed property: Returns rank details based on current level
-        
+
+        Cached per instance: the rank/rank_name/rank_icon/rank_color
+        properties and to_dict all funnel through here, so a leaderboard
+        row computes its rank once instead of once per property access.
+        Prefers the denormalized rank columns; rows written before the
+        migration backfill fall back to the level-table lookup.
+
         Returns:
             dict: {'name': str, 'icon': str, 'color': str}
             Example: {'name': 'Gold', 'icon': 'fa-shield-halved', 'color': '#FFD700'}
         """
+        if self.rank_name_col:
+            return {
+                'name': self.rank_name_col,
+                'icon': self.rank_icon_col,
+                'color': self.rank_color_col
+            }
         return GamificationService.get_rank(self.level)
 
+    # Equipped shop items, exposed as a relationship so list pages can batch
+    # them with selectinload (one IN query for all rendered users) instead of
+    # the per-user SELECT the old property issued. viewonly because the
+    # is_active filter lives in the join condition.
+    active_items = db.relationship(
+        'UserItem',
+        primaryjoin="and_(User.id == foreign(UserItem.user_id), UserItem.is_active == True)",
+        viewonly=True,
+    )
+
+    # Reverse collections, declared explicitly with back_populates instead
+    # of the legacy backref so each side carries a deliberate lazy strategy
+    # (silent per-row lazy loads were the default before)
+    support_tickets = db.relationship('SupportTicket', back_populates='user', lazy='dynamic')
+    badges = db.relationship('UserBadge', back_populates='user', lazy='select')
+    group_messages = db.relationship('GroupChatMessage', back_populates='user', lazy='select')
+    syllabus_documents = db.relationship('SyllabusDocument', back_populates='user', lazy='select')
+
     @property
     def active_frame_color(self):
         """
         Computed property: Returns the color of the user's equipped profile frame
-        
+
         Profile frames are cosmetic items purchased from the shop.
-        This property checks UserItem table for active frame items.
-        
+        Reads the active_items relationship (eager-loadable on list pages)
+        and resolves the frame via ShopService.FRAME_COLORS in one lookup.
+
         Returns:
             str: Hex color code (e.g., '#FF5733') or None if no frame equipped
         """
         try:
-            # Query all active items for this user
-            active_items = UserItem.query.filter_by(user_id=self.id, is_active=True).all()
-            for u_item in active_items:
-                # Look up item details in shop catalog
-                cat_item = ShopService.ITEMS.get(u_item.item_id)
-                if cat_item and cat_item.get('type') == 'frame':
-                    return cat_item.get('color')
+            for u_item in self.active_items:
+                color = ShopService.FRAME_COLORS.get(u_item.item_id)
+                if color is not None:
+                    return color
         except Exception:
             pass  # Graceful degradation if shop system unavailable
         return None
@@ -728,24 +1173,15 @@ class User(UserMixin, db.Model):
         Returns:
             str: Avatar image URL
         """
-        # Use uploaded profile image if available
-        if self.profile_image and "ui-avatars.com" not in self.profile_image:
+        # Use uploaded profile image if available (generated URLs always
+        # start with the UI Avatars origin — prefix check, not substring scan)
+        if self.profile_image and not self.profile_image.startswith('https://ui-avatars.com'):
             return self.profile_image
-        
-        # Extract initials from name
-        f_name = (self.first_name or '').strip()
-        l_name = (self.last_name or '').strip()
-        
-        f = f_name[0] if f_name else ''
-        l = l_name[0] if l_name else ''
-        
-        # Create initials (fallback to 'U' for User if no name)
-        initials = f"{f}{l}".upper()
-        if not initials:
-            initials = "U"
-        
-        # Generate avatar using UI Avatars API
-        return f"https://ui-avatars.com/api/?name={initials}&background=0ea5e9&color=fff&size={size}"
+
+        # Initials in one pass (fallback to 'U' for User if no name), then
+        # the cached URL for that initials/size pair
+        initials = ((self.first_name or '')[:1] + (self.last_name or '')[:1]).upper() or "U"
+        return _avatar_url(initials, size)
     
     def to_dict(self):
         """
@@ -760,7 +1196,7 @@ class User(UserMixin, db.Model):
         Returns:
             dict: User data with computed fields
         """
-        rank_data = GamificationService.get_rank(self.level)
+        rank_data = self.rank_info
         return {
             'id': self.id,
             'first_name': self.first_name,
@@ -774,6 +1210,62 @@ class User(UserMixin, db.Model):
             'is_public': self.is_public_profile
         }
 
+    # Column order expected by serialize_rows — keep the select() and the
+    # unpack below in sync.
+    SERIALIZE_COLUMNS = (
+        'id', 'first_name', 'last_name', 'level',
+        'total_xp', 'profile_image', 'is_public_profile'
+    )
+
+    @classmethod
+    def serialize_rows(cls, rows):
+        """
+        Serialize Core result rows into to_dict()-shaped dicts in one pass
+
+        Use for list pages (leaderboards, top-user tables) where rows come
+        from select(User.id, User.first_name, User.last_name, User.level,
+        User.total_xp, User.profile_image, User.is_public_profile) rather
+        than full ORM objects — plain tuple access plus the precomputed
+        rank table keeps per-row cost flat, with no attribute
+        instrumentation or lazy-load checks.
+
+        Args:
+            rows: iterable of Row tuples in SERIALIZE_COLUMNS order
+
+        Returns:
+            list[dict]: one to_dict()-shaped dict per row
+        """
+        # Globals bound to locals once — the loop body then runs on pure
+        # LOAD_FAST access, which is as close to a compiled serializer as
+        # CPython gets without a C extension
+        rank_table = _RANK_DICT_BY_LEVEL
+        avatar_url = _avatar_url
+        out = []
+        append = out.append
+        for uid, first_name, last_name, level, total_xp, profile_image, is_public in rows:
+            # Inlined get_avatar() — uploaded image or cached initials URL
+            if profile_image and not profile_image.startswith('https://ui-avatars.com'):
+                avatar = profile_image
+            else:
+                initials = ((first_name or '')[:1] + (last_name or '')[:1]).upper() or "U"
+                avatar = avatar_url(initials, 200)
+
+            # Inlined get_rank() — shared dict from the precomputed table
+            rank_data = rank_table[min(level if level and level >= 1 else 1, 101)]
+            append({
+                'id': uid,
+                'first_name': first_name,
+                'last_name': last_name,
+                'level': level,
+                'total_xp': total_xp,
+                'rank': rank_data['name'],
+                'rank_icon': rank_data['icon'],
+                'rank_color': rank_data['color'],
+                'avatar': avatar,
+                'is_public': is_public
+            })
+        return out
+
     # Privacy & Status Fields
     is_public_profile = db.Column(db.Boolean, default=True)  # Profile visibility
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)  # Last activity timestamp
@@ -804,7 +1296,9 @@ class SupportTicket(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    user = db.relationship('User', backref=db.backref('support_tickets', lazy=True))
+    # joined: ticket pages always render the reporter's name, so fetch the
+    # user in the same query instead of a lazy load per ticket
+    user = db.relationship('User', back_populates='support_tickets', lazy='joined')
     subject = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50), default='general')  # general, bug, inappropriate, help
     status = db.Column(db.String(20), default='open')  # open, in_progress, closed
@@ -817,6 +1311,21 @@ class SupportTicket(db.Model):
     user_unread_count = db.Column(db.Integer, default=0)  # Unread messages for user
     admin_unread_count = db.Column(db.Integer, default=1)  # Unread messages for admin (starts at 1 for new ticket)
 
+    __table_args__ = (
+        # Backs the navbar unread counts: per-user badge on the left, the
+        # admin badge on the right (partial — only rows with pending
+        # messages are indexed, which is a tiny fraction of all tickets)
+        db.Index('ix_ticket_user_unread', 'user_id', 'user_unread_count'),
+        # The predicate mirrors the navbar COUNT exactly (pending messages
+        # on an actionable ticket), so the planner can answer it with an
+        # index-only scan over just those rows
+        db.Index('ix_ticket_admin_unread', 'status',
+                 postgresql_where=db.text(
+                     "admin_unread_count > 0 AND status IN ('open', 'in_progress')"),
+                 sqlite_where=db.text(
+                     "admin_unread_count > 0 AND status IN ('open', 'in_progress')")),
+    )
+
 class SupportMessage(db.Model):
     """
     Support Message Model - Messages within a support ticket
@@ -857,7 +1366,14 @@ class Friendship(db.Model):
     friend_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Request receiver
     status = db.Column(db.String(20), default='pending')  # pending, accepted, rejected
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Request timestamp
-    
+
+    # Friend lists always filter on (user_id|friend_id, status) — composite
+    # indexes make both directions single B-tree probes
+    __table_args__ = (
+        db.Index('ix_friend_user_status', 'user_id', 'status'),
+        db.Index('ix_friend_friend_status', 'friend_id', 'status'),
+    )
+
     # Optional: Bidirectional relationships (commented out for simplicity)
     # user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('friendships_sent', lazy='dynamic'))
     # friend = db.relationship('User', foreign_keys=[friend_id], backref=db.backref('friendships_received', lazy='dynamic'))
@@ -925,9 +1441,15 @@ class UserBadge(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # User who earned badge
     badge_id = db.Column(db.Integer, db.ForeignKey('badge.id'), nullable=False)  # Badge earned
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)  # When badge was earned
-    
+
+    # A user can earn each badge once; the unique constraint doubles as the
+    # lookup index and lets award_badge insert with ON CONFLICT DO NOTHING
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'badge_id', name='uq_user_badge'),
+    )
+
     # Relationships for easy access
-    user = db.relationship('User', backref='badges')  # Access user.badges
+    user = db.relationship('User', back_populates='badges')  # Access user.badges
     badge = db.relationship('Badge')  # Access badge details
 
 class XPHistory(db.Model):
@@ -954,6 +1476,13 @@ class XPHistory(db.Model):
     amount = db.Column(db.Integer, nullable=False)  # XP amount (can be negative for losses)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # When XP was earned/lost
 
+    __table_args__ = (
+        # Covering composite index: per-user/per-source time-range scans
+        # (cap-style aggregates, activity timelines) include `amount`, so
+        # the DB can answer SUMs with an index-only scan — no heap fetches.
+        db.Index('ix_xph_user_source_ts_amount', 'user_id', 'source', 'timestamp', 'amount'),
+    )
+
 class GamificationService:
     """
     GamificationService - Business logic for XP, levels, ranks, and badges
@@ -1001,175 +1530,434 @@ class GamificationService:
 
     @staticmethod
     def get_rank(level):
-        if level is None: level = 1
-        for (min_lvl, max_lvl), (name, icon, color) in GamificationService.RANKS.items():
-            if min_lvl <= level <= max_lvl:
-                return {'name': name, 'icon': icon, 'color': color}
-        return {'name': 'Bronze', 'icon': 'fa-shield-halved', 'color': '#CD7F32'}
+        if not level or level < 1:
+            level = 1
+        # Flat O(1) table lookup returning a shared, read-only dict —
+        # no iteration and no allocation per call
+        return _RANK_DICT_BY_LEVEL[min(level, 101)]
 
     @staticmethod
-    def add_xp(user_id, source, amount, force_deduct=False):
-        user = User.query.get(user_id)
+    def add_xp(user_id, source, amount, force_deduct=False, commit=True):
+        """
+        Award (or deduct) XP. Dispatches to a per-source specialized path:
+        'focus' is the only source with a daily cap and time multiplier,
+        so every other source takes _add_xp_simple with those branches
+        compiled out entirely.
+
+        Pass commit=False to only stage the award on the session so a
+        caller (e.g. signup referral rewards) can batch several awards
+        into a single transaction.
+        """
+        handler = _ADD_XP_DISPATCH.get(source)
+        if handler is not None:
+            return handler(user_id, amount, force_deduct, commit)
+        return GamificationService._add_xp_simple(user_id, source, amount, force_deduct, commit)
+
+    @staticmethod
+    def _fetch_xp_user(user_id):
+        """
+        Load the user with only the columns the XP path touches — keeps
+        Text columns (about_me, ban_reason, cover_image) off the wire.
+
+        Returns:
+            (user, None) on success; (None, early_response) when the user
+            is missing or a demo account with XP locked.
+        """
+        user = db.session.get(User, user_id, options=[load_only(
+            User.id, User.email, User.total_xp, User.level,
+            User.current_streak, User.longest_streak, User.last_activity_date,
+            User.daily_focus_xp, User.daily_focus_xp_date, User.earned_badge_mask
+        )])
         if not user:
-            return
-        
+            return None, None
+
         # Prevent XP changes for demo/test users
         # This stops automatic XP increments for presentation/demo accounts
         demo_emails = ['daksh@gmail.com', 'daksh@studyverse.com', 'demo@studyverse.com']
         if user.email and user.email.lower() in demo_emails:
             print(f"XP change blocked for demo user: {user.email}")
-            return {'earned': 0, 'message': 'Demo account - XP locked'}
+            return None, {'earned': 0, 'message': 'Demo account - XP locked'}
+        return user, None
 
+    @staticmethod
+    def _scan_powerups(user_id, now):
+        """
+        Fetch and categorize the user's active power-ups via Core rows,
+        deactivating expired ones with a single bulk UPDATE.
 
-        # 1. Fetch ALL active power-ups for the user
-        active_powerups = ActivePowerUp.query.filter_by(
-            user_id=user.id,
-            is_active=True
+        Returns:
+            (xp_multiplier, time_multiplier, has_protection, active_boost)
+        """
+        powerup_rows = db.session.execute(
+            select(ActivePowerUp.id, ActivePowerUp.power_up_id,
+                   ActivePowerUp.multiplier, ActivePowerUp.expires_at)
+            .where(ActivePowerUp.user_id == user_id,
+                   ActivePowerUp.is_active)
         ).all()
-        
-        # 2. Categorize and clean up expired power-ups
+
         xp_multiplier = 1.0
         time_multiplier = 1.0
         has_protection = False
         active_boost = None
+        expired_ids = []
 
-        for powerup in active_powerups:
-            if powerup.is_expired():
-                powerup.is_active = False
+        # Hoist the class-attribute lookups out of the loop
+        xp_boost_ids = ShopService.XP_BOOST_IDS
+        time_boost_ids = ShopService.TIME_BOOST_IDS
+        protection_ids = ShopService.PROTECTION_IDS
+
+        for pu_id, item_id, multiplier, expires_at in powerup_rows:
+            if expires_at is not None and now > expires_at:
+                expired_ids.append(pu_id)
                 continue
-            
-            # Fetch item details from catalog to know the effect type
-            item_id = powerup.power_up_id
-            cat_item = ShopService.ITEMS.get(item_id)
-            if not cat_item: continue
 
-            effect = cat_item.get('effect')
-            
-            if effect in ['xp_multiplier', 'mega_xp_multiplier']:
-                if powerup.multiplier > xp_multiplier:
-                    xp_multiplier = powerup.multiplier
+            # Effect kind pre-classified at import — one set probe per row
+            # instead of catalog dict-gets and effect string comparisons
+            if item_id in xp_boost_ids:
+                if multiplier > xp_multiplier:
+                    xp_multiplier = multiplier
                     active_boost = item_id
-            elif effect == 'time_multiplier':
-                if powerup.multiplier > time_multiplier:
-                    time_multiplier = powerup.multiplier
-            elif effect == 'xp_protection':
+            elif item_id in time_boost_ids:
+                if multiplier > time_multiplier:
+                    time_multiplier = multiplier
+            elif item_id in protection_ids:
                 has_protection = True
-        
-        # 3. Handle XP loss protection
-        if amount < 0:
-            if not force_deduct and has_protection:
-                return {'earned': 0, 'message': 'XP Protection Active! No XP lost.'}
-            
-            # Direct deduction logic
-            user.total_xp = max(0, user.total_xp + amount) # Check bounds? Or allow negative? keeping 0 floor
-            
-            # Log negative history
-            log = XPHistory(user_id=user.id, source=source, amount=amount)
-            db.session.add(log)
-            db.session.commit()
-            return {'earned': amount, 'new_total': user.total_xp}
 
-        # 4. Apply special multipliers based on source (e.g., Double Time for focus)
-        actual_multiplier = xp_multiplier
-        if source == 'focus' and time_multiplier > 1.0:
-            # If both XP boost and Double Time are active, they might stack or we take the highest.
-            # Usually, Double Time specifically doubles the focus reward.
-            actual_multiplier *= time_multiplier
+        if expired_ids:
+            # One bulk UPDATE instead of dirtying an ORM instance per row
+            db.session.execute(
+                update(ActivePowerUp)
+                .where(ActivePowerUp.id.in_(expired_ids))
+                .values(is_active=False)
+            )
 
-        # 5. Cap Focus XP daily (Check BEFORE multipliers to keep cap consistent)
-        if source == 'focus':
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            daily_focus_xp = db.session.query(db.func.sum(XPHistory.amount))\
-                .filter(XPHistory.user_id == user.id, XPHistory.source == 'focus', XPHistory.timestamp >= today_start)\
-                .scalar() or 0
-            
-            # Simple daily cap logic: max 500 XP from focus per day
-            if daily_focus_xp >= 500:
-                return {'earned': 0, 'message': 'Daily Focus XP cap reached!'}
-            
-            if daily_focus_xp + amount > 500:
-                amount = 500 - daily_focus_xp
+        return xp_multiplier, time_multiplier, has_protection, active_boost
 
-        if amount <= 0:
-            return
+    @staticmethod
+    def _deduct_xp(user, source, amount, force_deduct, has_protection, commit=True):
+        """Negative-amount path, shared by all sources."""
+        if not force_deduct and has_protection:
+            return {'earned': 0, 'message': 'XP Protection Active! No XP lost.'}
 
-        # Apply multiplier
-        original_amount = amount
-        if actual_multiplier > 1.0:
-            amount = int(amount * actual_multiplier)
+        # Direct deduction logic
+        user.total_xp = max(0, user.total_xp + amount) # Check bounds? Or allow negative? keeping 0 floor
 
+        # Log negative history
+        log = XPHistory(user_id=user.id, source=source, amount=amount)
+        db.session.add(log)
+        if commit:
+            db.session.commit()
+        return {'earned': amount, 'new_total': user.total_xp}
+
+    @staticmethod
+    def _finalize_award(user, source, amount, original_amount, actual_multiplier, active_boost, commit=True):
+        """
+        Common tail of every award: apply XP, level check, history log,
+        streak, badges, one commit, and the result payload. `amount` is
+        the post-multiplier value actually credited. With commit=False
+        everything is staged on the session for the caller to commit.
+        """
         user.total_xp += amount
-        
+
         # Level Up Check
         new_level = GamificationService.calculate_level(user.total_xp)
         leveled_up = False
         if new_level > user.level:
             user.level = new_level
             leveled_up = True
-            
+
         # Log History
         log = XPHistory(user_id=user.id, source=source, amount=amount)
         db.session.add(log)
-        
+
         # Update Streak (if not already updated today)
         GamificationService.update_streak(user)
-        
+
         # Check Badges
         GamificationService.check_badges(user)
-        
+
+        if commit:
+            db.session.commit()
+
+        result = {
+            'earned': amount,
+            'new_total': user.total_xp,
+            'leveled_up': leveled_up,
+            'new_level': user.level,
+            'rank': GamificationService.get_rank(user.level)
+        }
+
+        # Add multiplier info if active
+        if actual_multiplier > 1.0:
+            result['multiplier'] = actual_multiplier
+            result['base_amount'] = original_amount
+            result['boost_active'] = active_boost
+
+        return result
+
+    @staticmethod
+    def _add_xp_simple(user_id, source, amount, force_deduct=False, commit=True):
+        """
+        Fast path for every non-focus source (quiz, battle, task, ...):
+        no daily cap, no time multiplier — just boost, award, finalize.
+        """
+        user, blocked = GamificationService._fetch_xp_user(user_id)
+        if user is None:
+            return blocked
+        now = datetime.utcnow()
+        xp_multiplier, _, has_protection, active_boost = \
+            GamificationService._scan_powerups(user.id, now)
+
+        if amount < 0:
+            return GamificationService._deduct_xp(user, source, amount, force_deduct, has_protection, commit)
+        if amount <= 0:
+            return
+
+        original_amount = amount
+        if xp_multiplier > 1.0:
+            amount = int(amount * xp_multiplier)
+
+        return GamificationService._finalize_award(
+            user, source, amount, original_amount, xp_multiplier, active_boost, commit)
+
+    @staticmethod
+    def _add_xp_focus(user_id, amount, force_deduct=False, commit=True):
+        """
+        Focus-specialized path: the only one with the 500 XP/day cap and
+        Double Time stacking, so those branches live here and nowhere else.
+        """
+        user, blocked = GamificationService._fetch_xp_user(user_id)
+        if user is None:
+            return blocked
+        now = datetime.utcnow()
+        xp_multiplier, time_multiplier, has_protection, active_boost = \
+            GamificationService._scan_powerups(user.id, now)
+
+        if amount < 0:
+            return GamificationService._deduct_xp(user, 'focus', amount, force_deduct, has_protection, commit)
+
+        # Double Time specifically doubles the focus reward; it stacks with
+        # any XP boost rather than competing with it
+        actual_multiplier = xp_multiplier
+        if time_multiplier > 1.0:
+            actual_multiplier *= time_multiplier
+
+        # Cap Focus XP daily (checked BEFORE multipliers to keep the cap
+        # consistent). Denormalized counter on the user row — roll it over
+        # on date change and read it directly; no XPHistory SUM on the hot
+        # path. When Redis is configured the per-day key is authoritative
+        # so the cap holds across workers too.
+        today = now.date()
+        if user.daily_focus_xp_date != today:
+            user.daily_focus_xp = 0
+            user.daily_focus_xp_date = today
+        daily_focus_xp = user.daily_focus_xp or 0
+
+        r = get_redis()
+        if r is not None:
+            try:
+                redis_count = r.get(f"focus_xp:{user.id}:{today.isoformat()}")
+                if redis_count is not None:
+                    daily_focus_xp = int(redis_count)
+            except Exception:
+                pass  # fall back to the column counter
+
+        # Simple daily cap logic: max 500 XP from focus per day
+        if daily_focus_xp >= 500:
+            return {'earned': 0, 'message': 'Daily Focus XP cap reached!'}
+
+        if daily_focus_xp + amount > 500:
+            amount = 500 - daily_focus_xp
+
+        if amount <= 0:
+            return
+
+        # Apply multiplier
+        original_amount = amount
+        if actual_multiplier > 1.0:
+            amount = int(amount * actual_multiplier)
+
+        # Advance the daily focus counter by what is actually logged (the
+        # old SUM counted post-multiplier amounts, so mirror that)
+        user.daily_focus_xp = (user.daily_focus_xp or 0) + amount
+        if r is not None:
+            try:
+                key = f"focus_xp:{user.id}:{today.isoformat()}"
+                with r.pipeline() as pipe:
+                    pipe.incrby(key, amount)
+                    pipe.expire(key, 90000)  # ~25h; key cleans itself up
+                    pipe.execute()
+            except Exception:
+                pass  # column counter still advanced above
+
+        return GamificationService._finalize_award(
+            user, 'focus', amount, original_amount, actual_multiplier, active_boost, commit)
+
+    @staticmethod
+    def add_xp_bulk(events):
+        """
+        Award XP to many users in one round-trip batch.
+
+        Args:
+            events: iterable of (user_id, source, amount) with amount > 0
+
+        For mass-award paths (reconciliation jobs, analytics backfills)
+        where calling add_xp per user would issue N SELECT/UPDATE/INSERT
+        cycles: this reads everyone's totals and boosts in two IN queries,
+        applies multipliers/levels/ranks in Python, then writes one
+        executemany UPDATE on user plus one bulk XPHistory insert.
+
+        Deliberately out of scope: the focus daily cap (bulk sources never
+        award focus XP), power-up expiry cleanup, and streak/badge checks.
+        Streaks are date-sensitive, so gameplay paths where the award may
+        be a user's only activity that day must use add_xp per user.
+
+        Returns:
+            int: number of events actually applied
+        """
+        events = [e for e in events if e[2] > 0]
+        if not events:
+            return 0
+        ids = {uid for uid, _, _ in events}
+        now = datetime.utcnow()
+
+        rows = db.session.execute(
+            select(User.id, User.total_xp, User.level).where(User.id.in_(ids))
+        ).all()
+        totals = {uid: [xp or 0, lvl or 1] for uid, xp, lvl in rows}
+
+        # Everyone's XP boosts in one IN query; take the strongest per user
+        boost_rows = db.session.execute(
+            select(ActivePowerUp.user_id, ActivePowerUp.power_up_id,
+                   ActivePowerUp.multiplier, ActivePowerUp.expires_at)
+            .where(ActivePowerUp.user_id.in_(ids),
+                   ActivePowerUp.is_active)
+        ).all()
+        xp_boost_ids = ShopService.XP_BOOST_IDS
+        boosts = {}
+        for uid, item_id, multiplier, expires_at in boost_rows:
+            if expires_at is not None and now > expires_at:
+                continue
+            if item_id in xp_boost_ids and multiplier > boosts.get(uid, 1.0):
+                boosts[uid] = multiplier
+
+        history = []
+        changed = set()
+        for uid, source, amount in events:
+            state = totals.get(uid)
+            if state is None:
+                continue
+            boost = boosts.get(uid, 1.0)
+            if boost > 1.0:
+                amount = int(amount * boost)
+            state[0] += amount
+            # Levels never go down, mirroring the per-user path
+            state[1] = max(state[1], GamificationService.calculate_level(state[0]))
+            changed.add(uid)
+            history.append({'user_id': uid, 'source': source,
+                            'amount': amount, 'timestamp': now})
+        if not history:
+            return 0
+
+        params = []
+        for uid in changed:
+            xp, lvl = totals[uid]
+            r_name, r_icon, r_color = _RANK_BY_LEVEL[min(lvl, 101)]
+            params.append({'b_id': uid, 'b_xp': xp, 'b_lvl': lvl,
+                           'b_rname': r_name, 'b_ricon': r_icon, 'b_rcolor': r_color})
+
+        # Core executemany UPDATE against the table (update(User) would be
+        # routed through ORM bulk-update-by-pk, which rejects bindparam
+        # WHERE criteria). Rank columns are maintained by hand since the
+        # total_xp 'set' listener only fires on ORM attribute writes.
+        db.session.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == bindparam('b_id'))
+            .values(total_xp=bindparam('b_xp'), level=bindparam('b_lvl'),
+                    rank_name=bindparam('b_rname'),
+                    rank_icon=bindparam('b_ricon'),
+                    rank_color=bindparam('b_rcolor')),
+            params,
+        )
+        db.session.bulk_insert_mappings(XPHistory, history)
         db.session.commit()
-        
-        result = {
-            'earned': amount, 
-            'new_total': user.total_xp, 
-            'leveled_up': leveled_up,
-            'new_level': user.level,
-            'rank': GamificationService.get_rank(user.level)
-        }
-        
-        # Add multiplier info if active
-        if actual_multiplier > 1.0:
-            result['multiplier'] = actual_multiplier
-            result['base_amount'] = original_amount
-            result['boost_active'] = active_boost
-        
-        return result
+        return len(history)
 
     @staticmethod
     def update_streak(user):
         today = datetime.utcnow().date()
         if user.last_activity_date == today:
             return # Already active today
-        
-        if user.last_activity_date == today - timedelta(days=1):
-            user.current_streak += 1
-        else:
-            user.current_streak = 1 # Reset if missed a day (or first time)
-            
-        user.last_activity_date = today
-        if user.current_streak > user.longest_streak:
-            user.longest_streak = user.current_streak
+
+        # Atomic UPDATE with the date logic in SQL: two concurrent XP events
+        # can no longer both read yesterday's value and double-increment the
+        # streak (the old Python read-modify-write race).
+        yesterday = today - timedelta(days=1)
+        new_streak = case(
+            (User.last_activity_date == today, User.current_streak),
+            (User.last_activity_date == yesterday, User.current_streak + 1),
+            else_=1,
+        )
+        row = db.session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                current_streak=new_streak,
+                longest_streak=case(
+                    (new_streak > User.longest_streak, new_streak),
+                    else_=User.longest_streak,
+                ),
+                last_activity_date=today,
+            )
+            .returning(User.current_streak, User.longest_streak)
+        ).one()
+
+        # Sync the in-memory instance from RETURNING without marking the
+        # attributes dirty (no extra SELECT, no redundant re-write on commit)
+        set_committed_value(user, 'current_streak', row[0])
+        set_committed_value(user, 'longest_streak', row[1])
+        set_committed_value(user, 'last_activity_date', today)
+
+    # Stable bit per canonical badge, mirrored in User.earned_badge_mask.
+    # Append-only: never reassign a bit once shipped.
+    BADGE_BITS = {
+        'Consistency King':  1 << 0,
+        'Rising Star':       1 << 1,
+        'Dedicated Scholar': 1 << 2,
+        'Centurion':         1 << 3,
+    }
 
     @staticmethod
     def check_badges(user):
+        # Short-circuit on the bitset: a user at steady state (all earned
+        # badges flagged) runs zero SQL here. award_badge sets the bit, so
+        # pre-migration users pay the old existence checks exactly once.
+        mask = user.earned_badge_mask or 0
+        bits = GamificationService.BADGE_BITS
+
         # 1. Streak Badges
-        if user.current_streak >= 30:
+        if user.current_streak >= 30 and not (mask & bits['Consistency King']):
             GamificationService.award_badge(user, 'Consistency King')
-        
+
         # 2. XP Badges (Level based roughly)
-        if user.level >= 10:
+        if user.level >= 10 and not (mask & bits['Rising Star']):
              GamificationService.award_badge(user, 'Rising Star')
-        if user.level >= 50:
+        if user.level >= 50 and not (mask & bits['Dedicated Scholar']):
              GamificationService.award_badge(user, 'Dedicated Scholar')
-        if user.level >= 100:
+        if user.level >= 100 and not (mask & bits['Centurion']):
              GamificationService.award_badge(user, 'Centurion')
-             
+
         # More rules can be added here
-        
+
     @staticmethod
     def award_badge(user, badge_name):
-        badge = Badge.query.filter_by(name=badge_name).first()
-        if not badge:
+        # Badge ids are immutable once created — resolve through the lazy
+        # module cache instead of a SELECT per award check
+        badge_id = _BADGE_IDS.get(badge_name)
+        badge = None
+        if badge_id is None:
+            badge = Badge.query.filter_by(name=badge_name).first()
+        if badge_id is None and not badge:
             # Create default if missing (lazy init)
             if badge_name == 'Consistency King':
                 badge = Badge(name='Consistency King', description='Achieve a 30-day streak', icon='fa-fire', criteria_type='streak', criteria_value=30)
@@ -1180,14 +1968,102 @@ class GamificationService:
             elif badge_name == 'Centurion':
                 badge = Badge(name='Centurion', description='Reach Level 100', icon='fa-crown', criteria_type='level', criteria_value=100)
             else:
-                return 
+                return
             db.session.add(badge)
-            db.session.commit()
-            
-        if not UserBadge.query.filter_by(user_id=user.id, badge_id=badge.id).first():
-            ub = UserBadge(user_id=user.id, badge_id=badge.id)
-            db.session.add(ub)
+            # Flush (not commit) so badge.id is assigned; the caller's single
+            # commit at the end of add_xp persists everything together.
+            db.session.flush()
+
+        if badge_id is None:
+            badge_id = badge.id
+            _BADGE_IDS[badge_name] = badge_id
+
+        # uq_user_badge makes the insert idempotent — ON CONFLICT DO NOTHING
+        # replaces the existence-check SELECT the old code ran per award
+        insert_fn = _DIALECT_UPSERT.get(db.engine.dialect.name)
+        if insert_fn is not None:
+            db.session.execute(
+                insert_fn(UserBadge)
+                .values(user_id=user.id, badge_id=badge_id, earned_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=['user_id', 'badge_id'])
+            )
+        elif not UserBadge.query.filter_by(user_id=user.id, badge_id=badge_id).first():
+            db.session.add(UserBadge(user_id=user.id, badge_id=badge_id))
+
+        # Flag the badge in the bitset so future check_badges calls skip
+        # this path without any queries
+        bit = GamificationService.BADGE_BITS.get(badge_name)
+        if bit:
+            user.earned_badge_mask = (user.earned_badge_mask or 0) | bit
+
+
+# Lazy badge-name -> badge.id cache; badge rows are append-only so entries
+# never go stale once resolved
+_BADGE_IDS = {}
+
+# INSERT constructs that support ON CONFLICT DO NOTHING, per dialect
+_DIALECT_UPSERT = {'postgresql': pg_insert, 'sqlite': sqlite_insert}
+
+# Per-source XP dispatch. Only 'focus' needs its own path (daily cap +
+# Double Time); every other source falls through to _add_xp_simple.
+_ADD_XP_DISPATCH = {
+    'focus': GamificationService._add_xp_focus,
+}
+
+
+def _build_rank_by_level():
+    """
+    Flatten GamificationService.RANKS into a level-indexed table so rank
+    lookup is a single list index instead of a scan over the range dict.
+    Index 101 covers every Grandmaster level (get_rank clamps with min()).
+    """
+    table = [None] * 102
+    for (min_lvl, max_lvl), data in GamificationService.RANKS.items():
+        for lvl in range(min_lvl, min(max_lvl, 101) + 1):
+            table[lvl] = data
+    table[0] = table[1]  # defensive: level 0 never occurs, but never KeyError
+    return table
+
+
+# Built once at import time; get_rank indexes into this on every call
+_RANK_BY_LEVEL = _build_rank_by_level()
+
+
+def _build_rank_dicts():
+    """
+    One shared dict per rank, indexed by level. get_rank hands the same
+    object back on every call instead of allocating a fresh dict — callers
+    only ever read from it, so sharing is safe and a 50-row leaderboard
+    allocates zero rank dicts.
+    """
+    shared = {}
+    table = []
+    for data in _RANK_BY_LEVEL:
+        if data not in shared:
+            name, icon, color = data
+            shared[data] = {'name': name, 'icon': icon, 'color': color}
+        table.append(shared[data])
+    return table
+
+
+_RANK_DICT_BY_LEVEL = _build_rank_dicts()
+
+
+@event.listens_for(User.total_xp, 'set', propagate=True)
+def _sync_rank_columns(user, value, oldvalue, initiator):
+    """
+    Keep the denormalized rank columns in step whenever total_xp changes.
 
+    Runs only on writes, so rank maintenance is amortized onto XP awards
+    and reads stay pure column access. Deliberately does NOT touch
+    user.level — add_xp compares the recomputed level against the stored
+    one to detect level-ups, and setting it here would mask them.
+    """
+    level = GamificationService.calculate_level(value or 0)
+    name, icon, color = _RANK_BY_LEVEL[min(level, 101)]
+    user.rank_name_col = name
+    user.rank_icon_col = icon
+    user.rank_color_col = color
 
 
 class Todo(db.Model):
@@ -1207,6 +2083,11 @@ class Todo(db.Model):
     completed_at = db.Column(db.DateTime)
     syllabus_id = db.Column(db.Integer, db.ForeignKey('syllabus_document.id'), nullable=True)
 
+    __table_args__ = (
+        # Backs the dashboard's per-category completion rollup
+        db.Index('ix_todo_user_category', 'user_id', 'category'),
+    )
+
 class Habit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -1236,6 +2117,81 @@ class StudySession(db.Model):
     mode = db.Column(db.String(20), default='focus')  # focus, shortBreak, longBreak
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class UserDailyStat(db.Model):
+    """
+    Per-user per-day rollup feeding the dashboard's weekly chart.
+    Maintained incrementally by the StudySession/Todo mapper events below,
+    so the chart reads at most 7 tiny rows by primary key instead of
+    re-aggregating the user's whole session/todo history on every load.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    focus_mins = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    goals_completed = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _bump_daily_stat(connection, user_id, day, focus=0, tasks=0, goals=0):
+    """Upsert one rollup row: insert the deltas or add them to the existing
+    counters. Runs on the flush connection so it commits (or rolls back)
+    atomically with the row that triggered it."""
+    tbl = UserDailyStat.__table__
+    ins = pg_insert(tbl) if connection.dialect.name == 'postgresql' else sqlite_insert(tbl)
+    connection.execute(
+        ins.values(user_id=user_id, date=day, focus_mins=focus,
+                   tasks_completed=tasks, goals_completed=goals)
+        .on_conflict_do_update(
+            index_elements=['user_id', 'date'],
+            set_={
+                'focus_mins': tbl.c.focus_mins + focus,
+                'tasks_completed': tbl.c.tasks_completed + tasks,
+                'goals_completed': tbl.c.goals_completed + goals,
+            })
+    )
+
+
+@event.listens_for(StudySession, 'after_insert')
+def _roll_session_insert(mapper, connection, target):
+    day = (target.completed_at or datetime.utcnow()).date()
+    _bump_daily_stat(connection, target.user_id, day, focus=target.duration or 0)
+
+
+def _todo_goal_delta(target, delta):
+    return delta if target.priority == 'high' else 0
+
+
+@event.listens_for(Todo, 'after_insert')
+def _roll_todo_insert(mapper, connection, target):
+    if target.completed:
+        day = (target.completed_at or datetime.utcnow()).date()
+        _bump_daily_stat(connection, target.user_id, day,
+                         tasks=1, goals=_todo_goal_delta(target, 1))
+
+
+@event.listens_for(Todo, 'after_update')
+def _roll_todo_update(mapper, connection, target):
+    insp = sa_inspect(target)
+    if not insp.attrs.completed.history.has_changes():
+        return
+    if target.completed:
+        day = (target.completed_at or datetime.utcnow()).date()
+        _bump_daily_stat(connection, target.user_id, day,
+                         tasks=1, goals=_todo_goal_delta(target, 1))
+    else:
+        # Un-completing: take the counter back off the day it was logged on
+        ca_hist = insp.attrs.completed_at.history
+        old = ca_hist.deleted[0] if ca_hist.deleted else target.completed_at
+        day = (old or datetime.utcnow()).date()
+        _bump_daily_stat(connection, target.user_id, day,
+                         tasks=-1, goals=_todo_goal_delta(target, -1))
+
+
+@event.listens_for(Todo, 'after_delete')
+def _roll_todo_delete(mapper, connection, target):
+    if target.completed and target.completed_at:
+        _bump_daily_stat(connection, target.user_id, target.completed_at.date(),
+                         tasks=-1, goals=_todo_goal_delta(target, -1))
+
 class TopicProficiency(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -1259,6 +2215,9 @@ class GroupMember(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('group_id', 'user_id', name='uq_group_member'),
+        # get_user_group filters by user and orders by joined_at desc on
+        # every page that shows group context
+        db.Index('ix_member_user_joined', 'user_id', 'joined_at'),
     )
 
 class GroupChatMessage(db.Model):
@@ -1270,7 +2229,9 @@ class GroupChatMessage(db.Model):
     file_path = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user = db.relationship('User', backref='group_messages')
+    # selectin: chat renders fetch messages in batches and read msg.user on
+    # every row — one IN query per batch instead of a SELECT per message
+    user = db.relationship('User', back_populates='group_messages', lazy='selectin')
 
 class SyllabusDocument(db.Model):
     """PDF syllabus documents uploaded by users"""
@@ -1284,7 +2245,7 @@ class SyllabusDocument(db.Model):
     is_active = db.Column(db.Boolean, default=True)  # For archiving
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    user = db.relationship('User', backref='syllabus_documents')
+    user = db.relationship('User', back_populates='syllabus_documents')
 
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -1296,6 +2257,12 @@ class Event(db.Model):
     is_notified = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # ISO date strings compare lexically, so range scans over a user's
+        # calendar window work straight off this index
+        db.Index('ix_event_user_date', 'user_id', 'date'),
+    )
+
 class AdminAction(db.Model):
     """Audit log for all admin actions"""
     id = db.Column(db.Integer, primary_key=True)
@@ -1341,62 +2308,48 @@ class ReferralReward(db.Model):
 # Data Structures (DS) Utilities
 # ------------------------------
 
-class Stack:
-    """Simple LIFO stack.
-
-    Used for: Undo delete in Todos.
-    """
-
-    def __init__(self):
-        self._items = []
-
-    def push(self, item):
-        self._items.append(item)
-
-    def pop(self):
-        if not self._items:
-            return None
-        return self._items.pop()
-
-    def is_empty(self):
-        return len(self._items) == 0
-
+# (The old Stack wrapper class is gone: a plain list IS a LIFO stack in
+# Python — append/pop are O(1) C methods, so wrapping them in one-line
+# delegating methods only added call overhead. See todos_undo.)
 
 class LRUCache:
-    """LRU Cache using dict + list (simplified).
+    """LRU Cache backed by OrderedDict.
 
     DS concept:
-    - Hash map (dict) for O(1) key lookup
-    - List to track usage order for eviction
+    - OrderedDict = hash map + doubly linked list in one structure:
+      O(1) lookup, O(1) recency bump (move_to_end), O(1) eviction
+      (popitem from the stale end). The old dict + list version paid an
+      O(n) list scan per hit for the same behaviour.
+
+    Thread-safe: instances are shared across request threads (e.g.
+    ChatService._cache), so get/put serialize on a lock — the critical
+    sections are a few dict operations, so contention is negligible.
     """
 
     def __init__(self, capacity=50):
         self.capacity = capacity
-        self.cache = {}
-        self.order = []  # most recent at end
+        self._od = collections.OrderedDict()
+        self._lock = threading.Lock()
 
     def get(self, key):
-        if key not in self.cache:
-            return None
-        if key in self.order:
-            self.order.remove(key)
-        self.order.append(key)
-        return self.cache[key]
+        with self._lock:
+            try:
+                self._od.move_to_end(key)  # mark as most recently used
+            except KeyError:
+                return None
+            return self._od[key]
 
     def put(self, key, value):
-        if key in self.cache:
-            self.cache[key] = value
-            if key in self.order:
-                self.order.remove(key)
-            self.order.append(key)
-            return
+        with self._lock:
+            if key in self._od:
+                self._od.move_to_end(key)
+            self._od[key] = value
+            if len(self._od) > self.capacity:
+                self._od.popitem(last=False)  # evict least recently used
 
-        if len(self.cache) >= self.capacity:
-            oldest = self.order.pop(0)
-            del self.cache[oldest]
-
-        self.cache[key] = value
-        self.order.append(key)
+    def clear(self):
+        with self._lock:
+            self._od.clear()
 
 
 # ------------------------------
@@ -1419,61 +2372,88 @@ class AuthService:
         if name_err:
             raise ValueError(name_err)
 
-        import random, string
         def generate_ref_code():
-            chars = string.ascii_uppercase + string.digits
-            return ''.join(random.choices(chars, k=8))
-
-        # Generate unique referral code for this new user
-        ref_code = generate_ref_code()
-        while User.query.filter_by(referral_code=ref_code).first():
-            ref_code = generate_ref_code()
+            # OS entropy + one C-level base32 encode (A-Z2-7): no Python
+            # per-char loop, and unpredictable unlike random.choices
+            return base64.b32encode(os.urandom(5)).decode('ascii')[:8]
 
         # Find referrer if a code was provided
         referrer = None
         if referral_code:
             referrer = User.query.filter_by(referral_code=referral_code).first()
 
-        user = User(
-            email=email,
-            password_hash=generate_password_hash(password),
-            first_name=first_name,
-            last_name=last_name,
-            referral_code=ref_code,
-            referred_by=referrer.id if referrer else None
-        )
-        db.session.add(user)
-        db.session.commit()
-
-        # Award XP to BOTH referrer and new user
-        if referrer:
-            try:
-                # Track the referral reward in DB
-                reward = ReferralReward(
-                    referrer_id=referrer.id,
-                    referred_id=user.id,
-                    xp_awarded=500  # Per person
-                )
-                db.session.add(reward)
-                db.session.commit()
+        # referral_code has a DB UNIQUE index, so no pre-check SELECT:
+        # insert optimistically and retry on the (36^8 space, effectively
+        # never) collision. Also closes the SELECT→INSERT race between
+        # concurrent signups.
+        ref_code = generate_ref_code()
+        for _attempt in range(5):
+            user = User(
+                email=email,
+                password_hash=generate_password_hash(password),
+                first_name=first_name,
+                last_name=last_name,
+                referral_code=ref_code,
+                referred_by=referrer.id if referrer else None
+            )
+            db.session.add(user)
 
-                # +500 XP to referrer (person who shared the link)
-                GamificationService.add_xp(referrer.id, 'referral', 500)
+            # Award XP to BOTH referrer and new user. Everything is staged on
+            # the session and written by the single commit below — one
+            # round-trip/fsync instead of four separate commits.
+            if referrer:
+                try:
+                    db.session.flush()  # assigns user.id without committing
+
+                    # Track the referral reward in DB. Core insert: the row
+                    # is write-only bookkeeping nobody reads back in this
+                    # request, so skip ORM hydration/identity-map work
+                    db.session.execute(insert(ReferralReward).values(
+                        referrer_id=referrer.id,
+                        referred_id=user.id,
+                        xp_awarded=500,  # Per person
+                    ))
 
-                # +500 XP to new user (person who joined via the link)
-                GamificationService.add_xp(user.id, 'referral_bonus', 500)
+                    # +500 XP to referrer (person who shared the link)
+                    GamificationService.add_xp(referrer.id, 'referral', 500, commit=False)
+
+                    # +500 XP to new user (person who joined via the link)
+                    GamificationService.add_xp(user.id, 'referral_bonus', 500, commit=False)
+
+                except IntegrityError as e:
+                    db.session.rollback()
+                    if 'referral_code' not in str(e.orig):
+                        # Not a code collision (e.g. duplicate email race) —
+                        # retrying the same insert can't succeed
+                        raise ValueError("Email already registered")
+                    ref_code = generate_ref_code()
+                    continue
+                except Exception as e:
+                    print(f"Referral reward error: {e}")
+                    db.session.rollback()
+                    db.session.add(user)  # keep the signup; only the reward is dropped
 
-            except Exception as e:
-                print(f"Referral reward error: {e}")
+            try:
+                db.session.commit()
+                # Unblock immediate first sign-in if this address was
+                # recently cached as non-existent
+                _NEG_EMAIL_CACHE.put(hashlib.sha256(email.encode()).digest(), 0.0)
+                return user
+            except IntegrityError as e:
                 db.session.rollback()
+                if 'referral_code' not in str(e.orig):
+                    # Not a code collision (e.g. duplicate email race)
+                    raise ValueError("Email already registered")
+                ref_code = generate_ref_code()
 
-
-        return user
+        raise ValueError("Could not generate a unique referral code")
 
     @staticmethod
-    def authenticate(email: str, password: str):
-        user = User.query.filter_by(email=email).first()
-        
+    def authenticate(email: str, password: str, _user: "User" = None):
+        # _user lets signin pass the row it already loaded instead of
+        # paying a second identical SELECT here
+        user = _user if _user is not None else User.query.filter_by(email=email).first()
+
         # Check if user exists
         if not user:
             return None
@@ -1495,21 +2475,27 @@ class GroupService:
 
     @staticmethod
     def _generate_invite_code(length: int = 6) -> str:
-        import random
-        import string
-
-        alphabet = string.ascii_uppercase + string.digits
-        return ''.join(random.choice(alphabet) for _ in range(length))
+        # OS entropy + one C-level base32 encode (A-Z2-7) instead of a
+        # predictable per-char random.choice loop
+        return base64.b32encode(os.urandom(5)).decode('ascii')[:length]
 
     @staticmethod
     def create_group(admin_user_id: int, name: str) -> Group:
+        # invite_code is UNIQUE at the DB level — insert optimistically
+        # and retry instead of a SELECT per candidate code (which also
+        # raced against concurrent creates).
         invite_code = GroupService._generate_invite_code()
-        while Group.query.filter_by(invite_code=invite_code).first() is not None:
-            invite_code = GroupService._generate_invite_code()
-
-        group = Group(name=name, admin_id=admin_user_id, invite_code=invite_code)
-        db.session.add(group)
-        db.session.commit()
+        for _attempt in range(5):
+            group = Group(name=name, admin_id=admin_user_id, invite_code=invite_code)
+            db.session.add(group)
+            try:
+                db.session.flush()  # assigns group.id
+                break
+            except IntegrityError:
+                db.session.rollback()
+                invite_code = GroupService._generate_invite_code()
+        else:
+            raise ValueError("Could not generate a unique invite code")
 
         db.session.add(GroupMember(group_id=group.id, user_id=admin_user_id))
         db.session.commit()
@@ -1521,12 +2507,14 @@ class GroupService:
         if not group:
             raise ValueError("Invalid invite code")
 
-        existing = GroupMember.query.filter_by(group_id=group.id, user_id=user_id).first()
-        if existing:
-            return group
-
-        db.session.add(GroupMember(group_id=group.id, user_id=user_id))
-        db.session.commit()
+        # uq_group_member guards duplicates at the DB level — insert and
+        # treat a violation as "already joined" instead of paying a
+        # pre-check SELECT on every join
+        try:
+            db.session.add(GroupMember(group_id=group.id, user_id=user_id))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
         return group
 
     @staticmethod
@@ -1550,6 +2538,8 @@ class SyllabusService:
         doc = SyllabusDocument(user_id=user_id, filename=filename, extracted_text=extracted_text)
         db.session.add(doc)
         db.session.commit()
+        # New syllabus invalidates the memoized chat-cache fingerprint
+        ChatService.invalidate_syllabus_cache(user_id)
         return doc
 
     @staticmethod
@@ -1575,7 +2565,9 @@ class SyllabusService:
             "{\"tasks\": [{\"title\": \"Chapter Name\", \"subtasks\": [\"Topic 1\", \"Topic 2\"]}]}"
         )
 
-        pdf_data = base64.b64encode(pdf_bytes).decode("utf-8")
+        # memoryview avoids copying the PDF before encoding; base64 output
+        # is pure ASCII so decode accordingly
+        pdf_data = base64.b64encode(memoryview(pdf_bytes)).decode("ascii")
         payload = {
             "contents": [
                 {
@@ -1596,7 +2588,7 @@ class SyllabusService:
             },
         }
 
-        response = requests.post(endpoint, json=payload, headers={'Content-Type': 'application/json'}, timeout=120)
+        response = _AI_SESSION.post(endpoint, json=payload, headers={'Content-Type': 'application/json'}, timeout=120)
         result_data = response.json() if response.text else {}
 
         if response.status_code != 200:
@@ -1622,17 +2614,19 @@ class SyllabusService:
         parsed = None
         # Try to parse JSON with multiple fallback approaches
         try:
-            parsed = json.loads(raw)
-        except json.JSONDecodeError:
-            # Try to extract JSON from the response
-            try:
-                start = raw.find("{")
-                end = raw.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    parsed = json.loads(raw[start : end + 1])
-            except json.JSONDecodeError:
-                pass
-        
+            parsed = _json_loads(raw)  # orjson when installed
+        except ValueError:
+            # Model wrapped the JSON in prose: raw_decode parses the first
+            # object in place and stops at its closing brace — one forward
+            # pass, no rfind/reslice of the whole blob
+            start = raw.find("{")
+            if start != -1:
+                try:
+                    parsed, _end = json.JSONDecoder().raw_decode(raw, start)
+                except json.JSONDecodeError:
+                    pass
+
+
         if parsed is None:
             raise ValueError("AI response could not be parsed as JSON. Please try again.")
 
@@ -1664,16 +2658,19 @@ class SyllabusService:
                 continue
             chapters.setdefault(t.category, []).append(t)
 
+        # Fetch proficiency for all chapters in one query (avoids one SELECT per category)
+        profs = dict(db.session.query(TopicProficiency.topic_name, TopicProficiency.proficiency).filter(
+            TopicProficiency.user_id == user_id,
+            TopicProficiency.topic_name.in_(chapters.keys())
+        ).all()) if chapters else {}
+
         result = []
         for category, items in chapters.items():
             total = len(items)
             completed = sum(1 for x in items if x.completed)
             percent = int((completed / total) * 100) if total else 0
-            
-            # Fetch proficiency for this chapter (category)
-            prof_entry = TopicProficiency.query.filter_by(user_id=user_id, topic_name=category).first()
-            proficiency = prof_entry.proficiency if prof_entry else 0
-            
+            proficiency = profs.get(category, 0)
+
             result.append({
                 'name': category,
                 'todos': items,
@@ -1691,6 +2688,36 @@ class SyllabusService:
 # API HELPERS
 # ------------------------------
 
+def _groq_complete(key, groq_messages, timeout=8):
+    """
+    One Groq chat completion with one key. Returns the reply text, or
+    None on rate-limit / error (caller decides how to rotate).
+    Groq's llama-3.1-8b-instant answers well under 8s, so a tight
+    timeout keeps a dead key from stalling the whole chat.
+    """
+    try:
+        resp = _AI_SESSION.post(
+            "https://api.groq.com/openai/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "llama-3.1-8b-instant",
+                "messages": groq_messages,
+                "temperature": 0.7,
+                "max_completion_tokens": 1024,
+            },
+            timeout=timeout
+        )
+        if resp.status_code == 200:
+            result = resp.json()
+            return result["choices"][0]["message"]["content"].strip()
+    except Exception:
+        pass
+    return None
+
+
 def call_nova_api(messages):
     """
     Dedicated for Nova: Uses Groq (Llama-3) with Key Rotation.
@@ -1705,28 +2732,28 @@ def call_nova_api(messages):
             elif role not in ['user', 'assistant', 'system']: role = 'user'
             groq_messages.append({"role": role, "content": m.get('content', '')})
 
-        for i, key in enumerate(GROQ_KEYS):
+        # Common case: the first key answers — one call, no extra quota.
+        reply = _groq_complete(GROQ_KEYS[0], groq_messages)
+
+        # First key is rate-limited or down: race the remaining keys in
+        # parallel and take whichever answers first, instead of burning
+        # up to 20s per key sequentially before the Gemini fallback.
+        if reply is None and len(GROQ_KEYS) > 1:
+            futures = [
+                _GROQ_EXECUTOR.submit(_groq_complete, key, groq_messages)
+                for key in GROQ_KEYS[1:]
+            ]
             try:
-                resp = requests.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "llama-3.1-8b-instant",
-                        "messages": groq_messages,
-                        "temperature": 0.7,
-                        "max_completion_tokens": 1024,
-                    },
-                    timeout=20
-                )
-                if resp.status_code == 200:
-                    result = resp.json()
-                    reply = result["choices"][0]["message"]["content"].strip()
-                    break
-                elif resp.status_code == 429: continue
-            except Exception: continue
+                for fut in as_completed(futures, timeout=10):
+                    result = fut.result()
+                    if result:
+                        reply = result
+                        break
+            except FuturesTimeoutError:
+                pass
+            finally:
+                for fut in futures:
+                    fut.cancel()
 
     if not reply:
         # Fallback to Gemini if Groq is down
@@ -1789,14 +2816,27 @@ def call_ai_api(messages):
     # or we can build the history string if using the chat model properly).
     # For simplicity/robustness here:
     
-    conversation_history = ""
+    # join() instead of += in a loop: linear instead of quadratic in the
+    # total history size
+    parts = []
     for m in messages:
         role = "User" if m['role'] == 'user' else "Model"
-        conversation_history += f"{role}: {m['content']}\n"
-    
-    # We'll just use the last prompt if we want simple stateless, but history is good.
-    # Actually, let's just send the last 2000 chars of history to avoid context limits if using free tier.
-    final_prompt = conversation_history[-3000:] 
+        parts.append(f"{role}: {m['content']}\n")
+    conversation_history = ''.join(parts)
+
+    # Trim the oldest history down to a ~3000-char budget (≈750 tokens at
+    # the usual 4-chars/token ratio) to stay inside free-tier context
+    # limits, cutting on a line boundary so no message arrives half-eaten.
+    # (tiktoken would count exactly, but its encodings don't match
+    # Gemini's tokenizer anyway — the heuristic costs nothing and avoids
+    # the dependency.)
+    final_prompt = conversation_history
+    if len(final_prompt) > 3000:
+        tail = final_prompt[-3000:]
+        nl = tail.find('\n')
+        if nl != -1 and tail[nl + 1:]:
+            tail = tail[nl + 1:]
+        final_prompt = tail
 
     try:
         model_id = os.environ.get("GEMINI_MODEL", "models/gemini-2.5-flash")
@@ -1804,7 +2844,7 @@ def call_ai_api(messages):
         # Use simple requests if genai lib issues, or if preferred.
         # But allow genai lib if available.
         if GEMINI_AVAILABLE:
-            model = genai.GenerativeModel(model_id)
+            model = _genai().GenerativeModel(model_id)
             # Create a chat session or just generate content
             # Mapping roles for Gemini (user/model)
             gemini_hist = []
@@ -1827,7 +2867,7 @@ def call_ai_api(messages):
                 }]
             }
             
-            r = requests.post(endpoint, json=payload, headers={'Content-Type': 'application/json'}, timeout=30)
+            r = _AI_SESSION.post(endpoint, json=payload, headers={'Content-Type': 'application/json'}, timeout=30)
             if r.status_code != 200:
                 raise ValueError(f"API Error {r.status_code}: {r.text}")
                 
@@ -1853,6 +2893,23 @@ class ChatService:
 
     _cache = LRUCache(capacity=100)
 
+    # user_id -> 8-byte blake2b fingerprint of the user's syllabus text.
+    # Part of the chat cache key, memoized so a chat turn doesn't rehash
+    # up to 3000 chars; save_syllabus drops the entry on new uploads.
+    _syllabus_fp = LRUCache(capacity=500)
+
+    # Built system prompts, keyed (user_id, syllabus_fp). The prompt only
+    # changes when the syllabus does, so rebuilding the guideline block +
+    # 3KB slice every turn was pure allocator churn. No explicit clear
+    # needed: a new syllabus means a new fingerprint, so stale entries
+    # simply stop being hit and age out of the LRU.
+    _prompt_cache = LRUCache(capacity=500)
+
+    @staticmethod
+    def invalidate_syllabus_cache(user_id: int):
+        """Drop the memoized fingerprint; next chat turn rehashes fresh text."""
+        ChatService._syllabus_fp.put(user_id, None)
+
     @staticmethod
     def build_system_prompt(user: User, syllabus_text: str) -> str:
         base = (
@@ -1890,30 +2947,52 @@ class ChatService:
 
     @staticmethod
     def generate_chat_response(user: User, message: str) -> str:
-        # 1. Check Cache
-        cached = ChatService._cache.get(message)
+        # 1. Check Cache — keyed on (user, syllabus fingerprint, message)
+        # so replies are never shared across users and entries for an old
+        # syllabus stop hitting (and age out) after a new upload. Keying on
+        # the message alone served user A's personalized answer to user B.
+        syllabus_text = None
+        fp = ChatService._syllabus_fp.get(user.id)
+        if fp is None:
+            syllabus_text = SyllabusService.get_syllabus_text(user.id)
+            fp = (hashlib.blake2b(syllabus_text.encode('utf-8'), digest_size=8).digest()
+                  if syllabus_text else b'')
+            ChatService._syllabus_fp.put(user.id, fp)
+
+        cache_key = (user.id, fp, message)
+        cached = ChatService._cache.get(cache_key)
         if cached:
             return cached
 
-        # 2. Get Context (Syllabus)
-        syllabus_text = SyllabusService.get_syllabus_text(user.id)
-        
-        # 3. Build Prompt
-        system_prompt = ChatService.build_system_prompt(user, syllabus_text)
-        
-        # We should ideally fetch recent chat history here for context window
-        recent_chats = ChatMessage.query.filter_by(user_id=user.id, is_group=False).order_by(ChatMessage.created_at.desc()).limit(5).all()
-        history = []
-        for msg in reversed(recent_chats):
-            history.append({'role': msg.role, 'content': msg.content})
-            
+        # 2+3. Build Prompt — memoized per (user, syllabus fingerprint);
+        # on a hit the syllabus text isn't refetched at all
+        prompt_key = (user.id, fp)
+        system_prompt = ChatService._prompt_cache.get(prompt_key)
+        if system_prompt is None:
+            if syllabus_text is None:
+                syllabus_text = SyllabusService.get_syllabus_text(user.id)
+            system_prompt = ChatService.build_system_prompt(user, syllabus_text)
+            ChatService._prompt_cache.put(prompt_key, system_prompt)
+
+        # We should ideally fetch recent chat history here for context window.
+        # Column-tuple query: only role/content come over the wire and no ORM
+        # instances are hydrated, so nothing here can trigger a lazy load.
+        recent_chats = db.session.execute(
+            select(ChatMessage.role, ChatMessage.content)
+            .where(ChatMessage.user_id == user.id, ~ChatMessage.is_group)
+            .order_by(ChatMessage.created_at.desc())
+            .limit(5)
+        ).all()
+        history = [{'role': role, 'content': content} for role, content in reversed(recent_chats)]
+
+
         messages = history + [{'role': 'user', 'content': f"{system_prompt}\n\nUser Question: {message}"}]
         
         # 4. Call API
         try:
             response = call_ai_api(messages)
             # 5. Cache Result
-            ChatService._cache.put(message, response)
+            ChatService._cache.put(cache_key, response)
             return response
         except Exception as e:
             return f"I'm having trouble connecting to my brain right now. Please try again later. (Error: {str(e)})"
@@ -1958,6 +3037,64 @@ def auth():
         return redirect(url_for('dashboard'))
     return render_template('auth.html')
 
+def _otp_digest(code: str) -> str:
+    """Keyed digest of an OTP code — what gets stored instead of the code.
+
+    The signup payload lands in Redis or the signed (but client-readable)
+    cookie session; keeping only an HMAC means the plaintext code exists
+    nowhere but the verification email. Hex so it survives JSON round-trips.
+    """
+    return hmac.new(app.secret_key.encode(), code.encode(), 'sha256').hexdigest()
+
+
+def _store_signup_data(payload: dict):
+    """
+    Park the pending-signup payload (incl. the OTP digest) server-side in Redis
+    under signup:{nonce} with a 600s EXPIRE, leaving only the ~16-byte
+    nonce in the cookie — the full payload used to ride along signed in
+    every request/response. Falls back to the cookie session when Redis
+    isn't configured.
+    """
+    r = get_redis()
+    if r is not None:
+        nonce = base64.b32encode(os.urandom(10)).decode('ascii')
+        try:
+            r.setex(f"signup:{nonce}", 600, _json_dumps_bytes(payload))
+            session['signup_nonce'] = nonce
+            return
+        except Exception:
+            pass  # Redis hiccup — cookie fallback below
+    session['signup_data'] = payload
+
+
+def _load_signup_data():
+    """Fetch the pending-signup payload; None if absent or expired."""
+    nonce = session.get('signup_nonce')
+    if nonce:
+        r = get_redis()
+        if r is not None:
+            try:
+                raw = r.get(f"signup:{nonce}")
+                if raw:
+                    return _json_loads(raw)
+            except Exception:
+                pass
+        return None  # expired (Redis TTL) or unreadable
+    return session.get('signup_data')
+
+
+def _clear_signup_data():
+    nonce = session.pop('signup_nonce', None)
+    if nonce:
+        r = get_redis()
+        if r is not None:
+            try:
+                r.delete(f"signup:{nonce}")
+            except Exception:
+                pass
+    session.pop('signup_data', None)
+
+
 @app.route('/signup', methods=['POST'])
 def signup():
     """Create account using standard HTML form POST (no JSON)."""
@@ -1989,8 +3126,7 @@ def signup():
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
     # ── 3. Email Format Validation ─────────────────────────────────────────────
-    email_regex = r'^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_regex, email):
+    if not _EMAIL_RE.match(email):
         flash('Please enter a valid email address.', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
@@ -2009,15 +3145,15 @@ def signup():
         flash('Password must be at least 8 characters long.', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
-    if not re.search(r"[A-Z]", password):
+    if not _PW_UPPER_RE.search(password):
         flash('Password must contain at least one uppercase letter.', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
-    if not re.search(r"[0-9]", password):
+    if not _PW_DIGIT_RE.search(password):
         flash('Password must contain at least one number.', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
-    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+    if not _PW_SPECIAL_RE.search(password):
         flash('Password must contain at least one special character (!@#$%^&*).', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
 
@@ -2040,23 +3176,27 @@ def signup():
     import random
     otp_code = str(random.randint(100000, 999999))
     
-    # Store registration data temporarily in the session
-    session['signup_data'] = {
+    # Store registration data temporarily (Redis-backed when available,
+    # cookie session otherwise)
+    _store_signup_data({
         'email': email,
         'password': password,
         'first_name': first_name,
         'last_name': last_name,
         'referral_code': referral_code,
-        'otp': otp_code,
-        'otp_time': datetime.utcnow().timestamp()
-    }
+        'otp_hmac': _otp_digest(otp_code),
+        'otp_time': time.time()
+    })
 
-    # Send OTP
-    success = send_otp_email(email, otp_code, first_name)
-    if not success:
-        session.pop('signup_data', None)
+    # Send OTP in the background so the signup response returns immediately
+    # instead of waiting out the SendGrid round trip. Fail fast only on the
+    # one error we can detect without the network: no API key configured.
+    if not os.getenv('SENDGRID_API_KEY'):
+        _clear_signup_data()
         flash('Failed to send verification email. Please try again later or check if the email is valid.', 'error')
         return render_template('auth.html', active_tab='signup', form_data=request.form)
+    _EMAIL_EXECUTOR.submit(send_otp_email, email, otp_code, first_name) \
+        .add_done_callback(_log_otp_send_result)
 
     # Redirect to the page where they enter the 6-digit code
     return redirect(url_for('verify_otp'))
@@ -2064,7 +3204,7 @@ def signup():
 @app.route('/verify-otp', methods=['GET', 'POST'])
 def verify_otp():
     """Route where users enter the 6-digit OTP sent to their email."""
-    signup_data = session.get('signup_data')
+    signup_data = _load_signup_data()
     if not signup_data:
         flash('Session expired or no signup in progress. Please sign up again.', 'error')
         return redirect(url_for('auth'))
@@ -2074,15 +3214,17 @@ def verify_otp():
         
         # Check expiry (10 minutes = 600 seconds)
         otp_time = signup_data.get('otp_time', 0)
-        current_time = datetime.utcnow().timestamp()
-        
+        current_time = time.time()
+
         if current_time - otp_time > 600:
-            session.pop('signup_data', None)
+            _clear_signup_data()
             flash('Verification code expired (10 minutes). Please sign up again.', 'error')
             return redirect(url_for('auth'))
             
-        # Check if code matches
-        if user_otp != signup_data.get('otp'):
+        # Check if code matches — compare keyed digests, constant-time, so
+        # response timing can't leak how many leading digits were right
+        expected_digest = signup_data.get('otp_hmac') or ''
+        if not hmac.compare_digest(_otp_digest(user_otp), expected_digest):
             flash('Invalid verification code. Please try again.', 'error')
             return render_template('otp_verify.html', email=signup_data.get('email'))
             
@@ -2097,7 +3239,7 @@ def verify_otp():
             )
             
             # Clear session data now that we are done
-            session.pop('signup_data', None)
+            _clear_signup_data()
             
             # Log in the user
             login_user(user, remember=True)
@@ -2112,22 +3254,59 @@ def verify_otp():
     # GET request — just show the form
     return render_template('otp_verify.html', email=signup_data.get('email'))
 
+# Signin emails recently confirmed non-existent: sha256(email) → monotonic
+# expiry. Credential-stuffing runs hammer random addresses; a hit here is
+# answered without touching the DB at all. Bounded LRU, 60s TTL so a fresh
+# signup is never shadowed for long (create_user also clears its entry).
+_NEG_EMAIL_CACHE = LRUCache(capacity=100_000)
+_NEG_EMAIL_TTL = 60
+
+# Verified against on the unknown-email paths so a signin attempt takes
+# the same time whether or not the address exists — otherwise the fast
+# rejection is a timing oracle for enumerating registered emails
+_DUMMY_HASH = generate_password_hash('x' * 32)
+
+# Prepared once at import: every signin reuses this statement object, so the
+# Core construction work happens zero times per request and the compiled SQL
+# is a guaranteed cache hit (the cache is keyed on the statement's identity).
+# Emails are normalized to lowercase at both signup and signin, so the plain
+# unique index on User.email serves this lookup directly.
+_USER_BY_EMAIL_STMT = select(User).where(User.email == bindparam('email'))
+
+
+def _user_by_email(email):
+    """Hot-path User lookup by (already normalized) email."""
+    return db.session.scalars(_USER_BY_EMAIL_STMT, {'email': email}).first()
+
+
 @app.route('/signin', methods=['POST'])
 def signin():
     """Sign in using standard HTML form POST (no JSON)."""
     email = request.form.get('email', '').strip().lower()
     password = request.form.get('password', '')
 
+    email_key = hashlib.sha256(email.encode()).digest()
+    if (_NEG_EMAIL_CACHE.get(email_key) or 0) > time.monotonic():
+        check_password_hash(_DUMMY_HASH, password)  # burn the same time as a real verify
+        flash('Invalid email or password.', 'error')
+        return redirect(url_for('auth'))
+
     # Check if user exists first
-    user = User.query.filter_by(email=email).first()
-    
-    if user and not user.password_hash:
+    user = _user_by_email(email)
+
+    if user is None:
+        _NEG_EMAIL_CACHE.put(email_key, time.monotonic() + _NEG_EMAIL_TTL)
+        check_password_hash(_DUMMY_HASH, password)  # keep miss timing equal to a failed verify
+        flash('Invalid email or password.', 'error')
+        return redirect(url_for('auth'))
+
+    if not user.password_hash:
         # User signed up with Google OAuth
         flash('This account was created with Google Sign-In. Please use the "Sign in with Google" button.', 'error')
         return redirect(url_for('auth'))
-    
-    # Authenticate with password
-    user = AuthService.authenticate(email, password)
+
+    # Authenticate with password (reusing the row loaded above)
+    user = AuthService.authenticate(email, password, _user=user)
     if not user:
         flash('Invalid email or password.', 'error')
         return redirect(url_for('auth'))
@@ -2142,15 +3321,24 @@ def signin():
 @app.route('/logout', methods=['GET', 'POST'])
 @login_required
 def logout():
-    print(f"Logging out user: {current_user.id}")
-    # Set last_seen to past to ensure immediate offline status
+    uid = current_user.id
+    app.logger.debug("Logging out user: %s", uid)
+    # Push last_seen into the past so the admin view shows offline right
+    # away — one bare UPDATE (no row load) committed together with the
+    # logout, instead of the old separate commit under a bare except.
     try:
-        current_user.last_seen = datetime.utcnow() - timedelta(minutes=15)
+        db.session.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == uid)
+            .values(last_seen=datetime.utcnow() - timedelta(minutes=15))
+        )
+        logout_user()
         db.session.commit()
-    except:
-        pass
-        
-    logout_user()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Logout cleanup failed for user %s", uid)
+        logout_user()
+    online_users.pop(uid, None)  # next sign-in re-flushes immediately
     session.clear()
     
     # Create response to clear cookies explicitly
@@ -2169,18 +3357,41 @@ def logout():
 @app.route('/login/google')
 def login_google():
     redirect_uri = url_for('google_callback', _external=True)
-    print(f"[GOOGLE AUTH] Initiating OAuth flow")
-    print(f"[GOOGLE AUTH] Redirect URI: {redirect_uri}")
+    app.logger.debug("[GOOGLE AUTH] Initiating OAuth flow, redirect_uri=%s", redirect_uri)
     return google.authorize_redirect(redirect_uri)
 
+def _upsert_user_by_email(values, on_conflict_update):
+    """Insert-or-update a user keyed on email, returning the ORM row.
+
+    One atomic ``INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING``
+    round-trip instead of the SELECT-then-INSERT the OAuth callbacks used
+    to do, which was both two queries and racy under concurrent first-time
+    sign-ins. PostgreSQL and SQLite both support the upsert + RETURNING
+    combination, so the same statement serves dev and production.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as _insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as _insert
+    stmt = (
+        _insert(User)
+        .values(**values)
+        .on_conflict_do_update(index_elements=['email'], set_=on_conflict_update)
+        .returning(User)
+    )
+    user = db.session.scalars(
+        stmt, execution_options={'populate_existing': True}
+    ).one()
+    db.session.commit()
+    return user
+
+
 @app.route('/login/google/callback')
 def google_callback():
-    print(f"[GOOGLE AUTH] Callback received")
-    print(f"[GOOGLE AUTH] Request args: {request.args}")
+    app.logger.debug("[GOOGLE AUTH] Callback received, args=%s", request.args)
     try:
-        print(f"[GOOGLE AUTH] Attempting to authorize access token...")
         token = google.authorize_access_token()
-        print(f"[GOOGLE AUTH] Token received successfully")
+        app.logger.debug("[GOOGLE AUTH] Token received successfully")
         user_info = google.parse_id_token(token, nonce=None)
         
         email = user_info.get('email')
@@ -2188,36 +3399,27 @@ def google_callback():
         name = user_info.get('name', '')
         picture = user_info.get('picture')
 
-        # Check if user exists
-        user = User.query.filter_by(email=email).first()
-        is_new_user = False
+        names = name.split(' ', 1) if name else ['', '']
+        first_name = names[0]
+        last_name = names[1] if len(names) > 1 else ''
 
-        if not user:
-            is_new_user = True
-            # Create new user
-            names = name.split(' ', 1) if name else ['', '']
-            first_name = names[0]
-            last_name = names[1] if len(names) > 1 else ''
-            
-            user = User(
-                email=email,
-                first_name=first_name,
-                last_name=last_name,
-                google_id=google_id,
-                profile_image=picture,
-                password_hash=None # No password for Google users
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Email functionality removed
-        else:
-            # Update existing user info
-            if not user.google_id:
-                user.google_id = google_id
-            if picture:
-                user.profile_image = picture
-            db.session.commit()
+        # Existing account: keep its google_id if already linked, and only
+        # touch the avatar when Google actually sent one.
+        set_ = {'google_id': func.coalesce(User.__table__.c.google_id, google_id)}
+        if picture:
+            set_['profile_image'] = picture
+
+        user = _upsert_user_by_email(
+            values=dict(
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                google_id=google_id,
+                profile_image=picture,
+                password_hash=None,  # No password for Google users
+            ),
+            on_conflict_update=set_,
+        )
 
         # Log the user in
         login_user(user, remember=True)
@@ -2226,23 +3428,13 @@ def google_callback():
         return redirect(url_for('dashboard'))
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"=" * 80)
-        print(f"ERROR during Google Auth:")
-        print(f"Exception Type: {type(e).__name__}")
-        print(f"Exception Message: {str(e)}")
-        print(f"Full Traceback:")
-        print(error_details)
-        print(f"=" * 80)
+        app.logger.exception("Google auth failed")
         flash(f"Google authentication failed: {str(e)}", "error")
         return redirect(url_for('auth'))
 
 @app.route('/api/auth/google', methods=['POST'])
 def google_auth():
     """Handle Google OAuth sign-in from Firebase."""
-    import uuid
-    
     data = request.get_json()
     if not data:
         return jsonify({'status': 'error', 'message': 'No data provided'}), 400
@@ -2253,28 +3445,23 @@ def google_auth():
     if not email:
         return jsonify({'status': 'error', 'message': 'Email is required'}), 400
     
-    # Check if user exists
-    user = User.query.filter_by(email=email).first()
-    is_new_user = False
-    
-    if not user:
-        is_new_user = True
-        # Create new user from Google account
-        names = display_name.split(' ', 1) if display_name else ['', '']
-        first_name = names[0] if names else ''
-        last_name = names[1] if len(names) > 1 else ''
-        
-        user = User(
+    names = display_name.split(' ', 1) if display_name else ['', '']
+    first_name = names[0]
+    last_name = names[1] if len(names) > 1 else ''
+
+    # Existing accounts are left untouched; the no-op email update just makes
+    # the conflict branch RETURNING the row instead of returning nothing.
+    user = _upsert_user_by_email(
+        values=dict(
             email=email,
-            password_hash=generate_password_hash(str(uuid.uuid4())),  # Random password for OAuth users
+            password_hash=None,  # No password for Google users (matches google_callback)
             first_name=first_name,
-            last_name=last_name
-        )
-        db.session.add(user)
-        db.session.commit()
-        
-        # Email functionality removed
-    
+            last_name=last_name,
+        ),
+        on_conflict_update={'email': email},
+    )
+
+
     # Log in the user
     login_user(user, remember=True)
     session.permanent = True
@@ -2320,13 +3507,137 @@ def admin_required(f):
 # ONLINE USERS TRACKER - In-memory set of currently connected user IDs
 # ============================================================================
 
-# Tracks user IDs currently active (updated on every request, cleared on logout)
-# Uses a simple set for O(1) add/remove/lookup — resets on server restart (ephemeral by design)
-online_users = set()
+# Tracks user IDs currently active, mapping user_id → monotonic time of the
+# last last_seen flush to the DB. The timestamp throttles presence writes:
+# a busy user (polling chat, ticking timers) flushes once a minute instead
+# of once per request. Resets on server restart (ephemeral by design).
+online_users = {}
 
 # How many minutes of inactivity before a user is considered "offline"
 ONLINE_THRESHOLD_MINUTES = 5
 
+# Minimum seconds between last_seen writes for one user — well under the
+# offline threshold above, so presence accuracy is unaffected
+LAST_SEEN_FLUSH_SECS = 60
+
+# Redis sorted-set of online user IDs scored by wall-clock time. When Redis
+# is configured the set is shared across workers (and restarts), so the admin
+# presence view stays correct under a multi-worker deployment; without Redis
+# the in-process tracker above is the source of truth, as before.
+ONLINE_ZSET_KEY = 'online_users'
+
+
+def _mark_online(uid, redis_client=None):
+    """Record a presence heartbeat for *uid* in the shared Redis ZSET."""
+    r = redis_client if redis_client is not None else get_redis()
+    if r is None:
+        return
+    try:
+        r.zadd(ONLINE_ZSET_KEY, {str(uid): time.time()})
+    except Exception:
+        pass  # presence is best-effort; never fail the request over it
+
+
+def _online_user_ids():
+    """IDs of users considered online right now.
+
+    Prefers the Redis ZSET (pruning entries older than the offline threshold
+    in the same call), falling back to the in-process tracker. Callers still
+    cross-check against ``User.last_seen``, so staleness here only costs a
+    slightly larger IN() list.
+    """
+    r = get_redis()
+    if r is not None:
+        try:
+            cutoff = time.time() - ONLINE_THRESHOLD_MINUTES * 60
+            r.zremrangebyscore(ONLINE_ZSET_KEY, '-inf', cutoff)
+            return [int(m) for m in r.zrangebyscore(ONLINE_ZSET_KEY, cutoff, '+inf')]
+        except Exception:
+            pass
+    return list(online_users)
+
+# Short-TTL ban-status cache: user_id → (monotonic expiry, is_banned,
+# ban_reason). Saves the per-request User SELECT in check_ban_status;
+# ban_user/unban_user drop the entry so a ban still bites immediately
+# (the app runs as a single worker, so in-process invalidation is enough).
+_BAN_CACHE = {}
+_BAN_CACHE_TTL = 60
+
+# Redis denylist of banned user IDs, kept in step with User.is_banned by the
+# admin ban/unban/delete paths and seeded from the DB at startup. When Redis
+# is configured this answers the common not-banned case with one SISMEMBER
+# instead of a Postgres SELECT, and (unlike the TTL cache above) it is shared
+# across workers, so a fresh ban bites everywhere immediately.
+BANNED_SET_KEY = 'banned_users'
+
+
+def _sync_banned_set(user_id, banned):
+    """Keep the Redis denylist in step with User.is_banned (best-effort)."""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        (r.sadd if banned else r.srem)(BANNED_SET_KEY, user_id)
+    except Exception:
+        pass
+
+
+def _seed_banned_set():
+    """Rebuild the Redis denylist from the database at startup."""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        ids = db.session.execute(select(User.id).where(User.is_banned)).scalars().all()
+        pipe = r.pipeline()
+        pipe.delete(BANNED_SET_KEY)
+        if ids:
+            pipe.sadd(BANNED_SET_KEY, *ids)
+        pipe.execute()
+    except Exception:
+        pass
+
+# Heartbeats waiting to be flushed to User.last_seen. Requests enqueue
+# (user_id, timestamp) pairs and return immediately; the daemon worker below
+# drains the queue in batches so the commit fsync never sits in a request's
+# latency path. Bounded so a stalled DB can't grow it without limit — a full
+# queue just drops the heartbeat, and the next throttle window retries.
+_HEARTBEAT_QUEUE = queue.Queue(maxsize=10_000)
+
+
+def _heartbeat_worker():
+    """Drain last_seen heartbeats in batches of up to 500 per transaction.
+
+    Deduplicates by user id (latest timestamp wins), so a burst from one
+    busy user still costs one row update. Runs forever as a daemon thread;
+    under eventlet's monkey-patching this is a green thread, not an OS one.
+    """
+    while True:
+        uid, ts = _HEARTBEAT_QUEUE.get()
+        batch = {uid: ts}
+        while len(batch) < 500:
+            try:
+                uid, ts = _HEARTBEAT_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            batch[uid] = ts
+        with app.app_context():
+            try:
+                db.session.execute(
+                    update(User.__table__)
+                    .where(User.__table__.c.id == bindparam('b_id'))
+                    .values(last_seen=bindparam('b_ts')),
+                    [{'b_id': u, 'b_ts': t} for u, t in batch.items()],
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+threading.Thread(target=_heartbeat_worker, name='last-seen-flush', daemon=True).start()
+
 # ============================================================================
 # BAN CHECK + LAST SEEN MIDDLEWARE
 # ============================================================================
@@ -2336,7 +3647,7 @@ def check_ban_status():
     """
     Runs on EVERY request:
     1. Updates user's last_seen timestamp (powers the admin activity tracker)
-    2. Adds user to the in-memory online_users set
+    2. Adds user to the in-memory online_users tracker
     3. Checks if user is banned → logs them out immediately if so
     """
     # Skip for static files and auth routes to avoid unnecessary DB hits
@@ -2344,23 +3655,55 @@ def check_ban_status():
         return None
 
     if current_user.is_authenticated:
-        # Reload user from DB to get the freshest ban status
-        user = User.query.get(current_user.id)
-
-        if user and user.is_banned:
+        uid = current_user.id
+        now_mono = time.monotonic()
+
+        # Ban status from the short-TTL cache; only a stale/missing entry
+        # costs a two-column SELECT (was: a full User row load per request)
+        cached = _BAN_CACHE.get(uid)
+        if cached is not None and cached[0] > now_mono:
+            banned, ban_reason = cached[1], cached[2]
+        else:
+            banned, ban_reason = None, None
+            r = get_redis()
+            if r is not None:
+                # The denylist settles the common case (not banned) without
+                # touching Postgres; a hit still falls through to the SELECT
+                # because the flash message needs the ban reason.
+                try:
+                    if not r.sismember(BANNED_SET_KEY, uid):
+                        banned = False
+                except Exception:
+                    pass
+            if banned is None:
+                row = db.session.execute(
+                    select(User.is_banned, User.ban_reason).where(User.id == uid)
+                ).first()
+                if row is None:
+                    return None  # account deleted mid-session
+                banned, ban_reason = bool(row[0]), row[1]
+            _BAN_CACHE[uid] = (now_mono + _BAN_CACHE_TTL, banned, ban_reason)
+
+        if banned:
             from flask_login import logout_user
             logout_user()
-            flash(f'Your account has been banned. Reason: {user.ban_reason or "Violation of terms"}', 'error')
+            flash(f'Your account has been banned. Reason: {ban_reason or "Violation of terms"}', 'error')
             return redirect(url_for('auth'))
 
-        # ── Update last_seen + online set ──────────────────────────────────
-        if user:
+        # ── Update last_seen + online tracker (throttled) ──────────────────
+        # Writing last_seen inline meant a DB round-trip + fsync in the
+        # request path. Enqueue at most once per LAST_SEEN_FLUSH_SECS and
+        # let the background worker batch the actual UPDATEs; in between,
+        # the tracker entry alone proves the user is online.
+        if now_mono - online_users.get(uid, 0.0) >= LAST_SEEN_FLUSH_SECS:
             try:
-                user.last_seen = datetime.utcnow()
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-            online_users.add(current_user.id)
+                _HEARTBEAT_QUEUE.put_nowait((uid, datetime.utcnow()))
+                online_users[uid] = now_mono
+            except queue.Full:
+                pass  # dropped; the next request past the throttle retries
+            # Heartbeat rides the same throttle: one ZADD a minute per user
+            # keeps the shared set fresh well inside the 5-minute window.
+            _mark_online(uid)
 
     return None
 
@@ -2383,14 +3726,21 @@ class AdminService:
     
     @staticmethod
     def get_dashboard_stats():
-        """Get statistics for admin dashboard"""
-        total_users = User.query.count()
-        active_users = User.query.filter(
-            User.last_seen >= datetime.utcnow() - timedelta(days=7)
-        ).count()
-        total_pdfs = SyllabusDocument.query.count()
-        total_groups = Group.query.count()
-        
+        """Get statistics for admin dashboard.
+
+        All four counts ride in one SELECT of scalar subqueries — one
+        round-trip instead of four separate COUNT queries.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=7)
+        total_users, active_users, total_pdfs, total_groups = db.session.execute(
+            select(
+                select(func.count()).select_from(User).scalar_subquery(),
+                select(func.count()).select_from(User).where(User.last_seen >= cutoff).scalar_subquery(),
+                select(func.count()).select_from(SyllabusDocument).scalar_subquery(),
+                select(func.count()).select_from(Group).scalar_subquery(),
+            )
+        ).one()
+
         return {
             'total_users': total_users,
             'active_users': active_users,
@@ -2409,9 +3759,11 @@ class AdminService:
         user.ban_reason = reason
         user.banned_at = datetime.utcnow()
         user.banned_by = admin_id
-        
+
         db.session.commit()
-        
+        _BAN_CACHE.pop(user_id, None)  # ban takes effect on their next request
+        _sync_banned_set(user_id, True)
+
         AdminService.log_action(
             admin_id=admin_id,
             action='ban_user',
@@ -2431,9 +3783,11 @@ class AdminService:
         user.ban_reason = None
         user.banned_at = None
         user.banned_by = None
-        
+
         db.session.commit()
-        
+        _BAN_CACHE.pop(user_id, None)
+        _sync_banned_set(user_id, False)
+
         AdminService.log_action(
             admin_id=admin_id,
             action='unban_user',
@@ -2448,24 +3802,24 @@ class AdminService:
         if not user:
             raise ValueError("User not found")
         
-        # 1. Habits (delete logs first)
-        habits = Habit.query.filter_by(user_id=user_id).all()
-        for habit in habits:
-            HabitLog.query.filter_by(habit_id=habit.id).delete()
+        # 1. Habits — delete logs via an IN-subquery instead of loading
+        # every habit and issuing one DELETE per row
+        db.session.execute(delete(HabitLog).where(
+            HabitLog.habit_id.in_(select(Habit.id).where(Habit.user_id == user_id))
+        ))
         Habit.query.filter_by(user_id=user_id).delete()
-        
-        # 2. Support Tickets (delete messages first)
-        tickets = SupportTicket.query.filter_by(user_id=user_id).all()
-        for ticket in tickets:
-            SupportMessage.query.filter_by(ticket_id=ticket.id).delete()
-            db.session.delete(ticket)
-            
-        # 3. Groups where user is admin (delete messages and members first)
-        groups = Group.query.filter_by(admin_id=user_id).all()
-        for group in groups:
-            GroupMember.query.filter_by(group_id=group.id).delete()
-            GroupChatMessage.query.filter_by(group_id=group.id).delete()
-            db.session.delete(group)
+
+        # 2. Support Tickets (messages first, same subquery pattern)
+        db.session.execute(delete(SupportMessage).where(
+            SupportMessage.ticket_id.in_(select(SupportTicket.id).where(SupportTicket.user_id == user_id))
+        ))
+        SupportTicket.query.filter_by(user_id=user_id).delete()
+
+        # 3. Groups where user is admin (members and messages first)
+        admin_group_ids = select(Group.id).where(Group.admin_id == user_id)
+        db.session.execute(delete(GroupMember).where(GroupMember.group_id.in_(admin_group_ids)))
+        db.session.execute(delete(GroupChatMessage).where(GroupChatMessage.group_id.in_(admin_group_ids)))
+        Group.query.filter_by(admin_id=user_id).delete()
 
         # 4. Standard one-to-many dependencies
         Todo.query.filter_by(user_id=user_id).delete()
@@ -2482,6 +3836,7 @@ class AdminService:
         GroupChatMessage.query.filter_by(user_id=user_id).delete()
         UserFeedback.query.filter_by(user_id=user_id).delete()
         StudyStream.query.filter_by(user_id=user_id).delete()
+        UserDailyStat.query.filter_by(user_id=user_id).delete()
         
         # 5. Many-to-many & other relationships
         Friendship.query.filter(db.or_(Friendship.user_id==user_id, Friendship.friend_id==user_id)).delete()
@@ -2491,7 +3846,11 @@ class AdminService:
         # 6. Delete User
         db.session.delete(user)
         db.session.commit()
-        
+        # Drop any cached ban status so a lingering session for this account
+        # falls through to the SELECT (and logs out) on its next request
+        _BAN_CACHE.pop(user_id, None)
+        _sync_banned_set(user_id, False)
+
         # Log action after commit
         AdminService.log_action(
             admin_id=admin_id,
@@ -2517,8 +3876,8 @@ class SupportService:
             admin_unread_count=1  # Admin has 1 unread message
         )
         db.session.add(ticket)
-        db.session.commit()
-        
+        db.session.flush()  # assigns ticket.id without the first commit
+
         # Create initial message
         msg = SupportMessage(
             ticket_id=ticket.id,
@@ -2545,8 +3904,8 @@ class SupportService:
             admin_unread_count=0
         )
         db.session.add(ticket)
-        db.session.commit()
-        
+        db.session.flush()  # assigns ticket.id without the first commit
+
         # Create initial message from Admin
         msg = SupportMessage(
             ticket_id=ticket.id,
@@ -2616,6 +3975,12 @@ class SupportService:
 # ============================================================================
 @app.context_processor
 def inject_support_notifications():
+    # Context processors fire once per render_template AND per include —
+    # memoize on g so one request never runs the COUNT twice
+    cached = g.get('_unread_support_count')
+    if cached is not None:
+        return dict(unread_support_count=cached)
+
     unread_support = 0
     if current_user.is_authenticated:
         try:
@@ -2634,32 +3999,116 @@ def inject_support_notifications():
                 ).count()
         except:
             pass # Handle case where tables don't exist yet
-            
+
+    g._unread_support_count = unread_support
     return dict(unread_support_count=unread_support)
 
 # ============================================================================
 # DASHBOARD (Main App Interface)
 # ============================================================================
 
+# Optional Redis page cache for the dashboard: the route runs a dozen-plus
+# queries, and active users reload it on nearly every navigation. The
+# rendered HTML is cached per user under dash:{user_id} with a short TTL;
+# the ORM commit hooks below drop the key whenever any model feeding the
+# page changes, so the cache never shows stale todo/focus/habit numbers.
+# Without Redis all of this is inert.
+_DASH_CACHE_TTL = 45
+
+
+def _dash_cache_key(user_id):
+    return f"dash:{user_id}"
+
+
+def _invalidate_dashboard_cache(user_id):
+    r = get_redis()
+    if r is not None:
+        try:
+            r.delete(_dash_cache_key(user_id))
+        except Exception:
+            pass
+
+
+# Models whose rows feed the dashboard page, each carrying user_id directly
+_DASH_SOURCE_MODELS = (Todo, StudySession, Habit, Event, TopicProficiency)
+
+
+@event.listens_for(Session, 'before_commit')
+def _collect_dash_dirty(sess):
+    """Note which users' dashboards this commit touches (ORM writes only)."""
+    if get_redis() is None:
+        return
+    dirty = sess.info.setdefault('_dash_dirty', set())
+    for obj in sess.new.union(sess.dirty).union(sess.deleted):
+        if isinstance(obj, _DASH_SOURCE_MODELS):
+            if obj.user_id is not None:
+                dirty.add(obj.user_id)
+        elif isinstance(obj, HabitLog):
+            habit = sess.get(Habit, obj.habit_id)
+            if habit is not None:
+                dirty.add(habit.user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _flush_dash_dirty(sess):
+    dirty = sess.info.pop('_dash_dirty', None)
+    if not dirty:
+        return
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.delete(*[_dash_cache_key(uid) for uid in dirty])
+    except Exception:
+        pass
+
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
     # Redirect admins to admin panel
     if current_user.is_admin:
         return redirect(url_for('admin_dashboard'))
-    
-    # Dashboard logic starts here
-    total_todos = Todo.query.filter_by(user_id=current_user.id).count()
-    completed_todos = Todo.query.filter_by(user_id=current_user.id, completed=True).count()
+
+    # Serve the cached page when possible. Skipped whenever a flash message
+    # is pending, both ways — a cached page must neither swallow a fresh
+    # flash nor replay one baked into earlier HTML.
+    redis_client = get_redis()
+    can_cache = redis_client is not None and not session.get('_flashes')
+    if can_cache:
+        try:
+            cached_page = redis_client.get(_dash_cache_key(current_user.id))
+            if cached_page:
+                return cached_page.decode('utf-8')
+        except Exception:
+            can_cache = False
+
+    # Dashboard logic starts here.
+    # Conditional aggregation: total, completed and today's completions all
+    # come from one scan of the user's todos instead of three COUNT queries.
+    today_date_utc = datetime.utcnow().date()
+    total_todos, completed_todos, today_completed = db.session.query(
+        db.func.count(Todo.id),
+        db.func.coalesce(db.func.sum(case((Todo.completed, 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(case(
+            (db.and_(Todo.completed, db.func.date(Todo.created_at) == today_date_utc), 1),
+            else_=0)), 0),
+    ).filter(Todo.user_id == current_user.id).one()
     remaining_todos = max(total_todos - completed_todos, 0)
 
+    # Weekly total and today's total from the same scan — today's sessions
+    # are a subset of the trailing week, so a CASE sum rides along for free
+    # (today_study_mins feeds quest 2 further down)
     week_ago = datetime.utcnow() - timedelta(days=7)
-    weekly_minutes = (
-        db.session.query(db.func.coalesce(db.func.sum(StudySession.duration), 0))
-        .filter(StudySession.user_id == current_user.id)
-        .filter(StudySession.completed_at >= week_ago)
-        .scalar()
-    )
+    weekly_minutes, today_study_mins = db.session.query(
+        db.func.coalesce(db.func.sum(StudySession.duration), 0),
+        db.func.coalesce(db.func.sum(case(
+            (db.func.date(StudySession.completed_at) == today_date_utc, StudySession.duration),
+            else_=0)), 0),
+    ).filter(
+        StudySession.user_id == current_user.id,
+        StudySession.completed_at >= week_ago
+    ).one()
     weekly_hours = round((weekly_minutes or 0) / 60.0, 1)
 
     completion_percent = int((completed_todos / total_todos) * 100) if total_todos else 0
@@ -2671,13 +4120,12 @@ def dashboard():
         .limit(6)
         .all()
     )
-    avg_proficiency = (
-        db.session.query(db.func.coalesce(db.func.avg(TopicProficiency.proficiency), 0))
-        .filter(TopicProficiency.user_id == current_user.id)
-        .scalar()
-    )
+    # Same trick for proficiency: topic count and average in one round-trip
+    topics_covered, avg_proficiency = db.session.query(
+        db.func.count(TopicProficiency.id),
+        db.func.coalesce(db.func.avg(TopicProficiency.proficiency), 0),
+    ).filter(TopicProficiency.user_id == current_user.id).one()
     avg_proficiency = int(round(avg_proficiency or 0))
-    topics_covered = TopicProficiency.query.filter_by(user_id=current_user.id).count()
 
     recent_todos = (
         Todo.query
@@ -2698,39 +4146,43 @@ def dashboard():
     # COMPLETED PARENT TASKS
     # (Categories where every subtask is done)
     # -------------------------
-    all_user_todos = Todo.query.filter_by(user_id=current_user.id).all()
-    cat_map = {}
-    for t in all_user_todos:
-        cat = t.category if (t.category and t.category.strip()) else None
-        if not cat: continue
-        if cat not in cat_map:
-            cat_map[cat] = []
-        cat_map[cat].append(t)
-    
-    completed_parent_tasks = []
     today_utc = datetime.utcnow()
     start_of_week = today_utc - timedelta(days=today_utc.weekday())
     start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    for cat, tasks in cat_map.items():
-        if all(tk.completed for tk in tasks):
-            # Check if at least one was completed this week
-            # Or if it's a recently finished project
-            recent_completion = any(tk.completed_at and tk.completed_at >= start_of_week for tk in tasks)
-            if recent_completion:
-                completed_parent_tasks.append(cat)
+    # One GROUP BY replaces loading every todo the user ever made into
+    # Python: a category counts when its least-completed row is completed
+    # (min over a CASE — works on SQLite and Postgres alike, unlike
+    # bool_and) and its latest completion falls inside this week.
+    completed_parent_tasks = [
+        row[0] for row in db.session.query(Todo.category)
+        .filter(
+            Todo.user_id == current_user.id,
+            Todo.category.isnot(None),
+            db.func.trim(Todo.category) != ''
+        )
+        .group_by(Todo.category)
+        .having(db.and_(
+            db.func.min(case((Todo.completed, 1), else_=0)) == 1,
+            db.func.max(Todo.completed_at) >= start_of_week
+        ))
+        .all()
+    ]
 
     # -------------------------
     # WEEKLY COMPLETED EVENTS
     # -------------------------
     today_date = datetime.utcnow().date()
     start_of_week_date = today_date - timedelta(days=today_date.weekday())
-    week_date_strs = [(start_of_week_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-    
+    # ISO date strings order lexically, so a BETWEEN range replaces the old
+    # 7-element IN list — one index range scan on (user_id, date)
+    week_start_str = start_of_week_date.strftime('%Y-%m-%d')
+    week_end_str = (start_of_week_date + timedelta(days=6)).strftime('%Y-%m-%d')
+
     completed_events_week = (
         Event.query
         .filter_by(user_id=current_user.id, is_notified=True)
-        .filter(Event.date.in_(week_date_strs))
+        .filter(Event.date.between(week_start_str, week_end_str))
         .order_by(Event.date.desc(), Event.time.desc())
         .all()
     )
@@ -2745,10 +4197,8 @@ def dashboard():
     
     # Daily Quests (simple example quests based on user activity)
     quests = []
-    # Quest 1: Complete 3 tasks today
-    today_completed = Todo.query.filter_by(user_id=current_user.id, completed=True).filter(
-        db.func.date(Todo.created_at) == datetime.utcnow().date()
-    ).count()
+    # Quest 1: Complete 3 tasks today (today_completed rode along in the
+    # combined todo aggregate at the top)
     quests.append({
         'description': 'Complete 3 tasks',
         'icon': 'fa-check-circle',
@@ -2758,13 +4208,8 @@ def dashboard():
         'completed': today_completed >= 3
     })
     
-    # Quest 2: Study for 30 minutes
-    today_study_mins = (
-        db.session.query(db.func.coalesce(db.func.sum(StudySession.duration), 0))
-        .filter(StudySession.user_id == current_user.id)
-        .filter(db.func.date(StudySession.completed_at) == datetime.utcnow().date())
-        .scalar()
-    ) or 0
+    # Quest 2: Study for 30 minutes (today_study_mins came from the
+    # combined study-session aggregate near the top)
     quests.append({
         'description': 'Study for 30 minutes',
         'icon': 'fa-clock',
@@ -2793,37 +4238,31 @@ def dashboard():
     start_of_week = today - timedelta(days=today.weekday()) 
     dates = [start_of_week + timedelta(days=i) for i in range(7)]
     
+    week_end = start_of_week + timedelta(days=6)
+
+    # The whole week comes from at most 7 rollup rows (maintained on write
+    # by the UserDailyStat mapper events) — no re-aggregation of session or
+    # todo history at read time. Counters are clamped at zero in case an
+    # un-complete ever landed on a different day than its completion.
+    stat_rows = UserDailyStat.query.filter(
+        UserDailyStat.user_id == current_user.id,
+        UserDailyStat.date >= start_of_week,
+        UserDailyStat.date <= week_end
+    ).all()
+    focus_by_day = {s.date.isoformat(): max(s.focus_mins, 0) for s in stat_rows}
+    tasks_by_day = {s.date.isoformat(): max(s.tasks_completed, 0) for s in stat_rows}
+    goals_by_day = {s.date.isoformat(): max(s.goals_completed, 0) for s in stat_rows}
+
     daily_stats = []
-    total_focus_week = 0
-    total_tasks_week = 0
-    total_goals_week = 0 
-    
+    total_focus_week = sum(focus_by_day.values())
+    total_tasks_week = sum(tasks_by_day.values())
+    total_goals_week = sum(goals_by_day.values())
+
     for d in dates:
-        # 1. Daily Focus Mins
-        d_focus = db.session.query(db.func.sum(StudySession.duration)).filter(
-            StudySession.user_id == current_user.id,
-            db.func.date(StudySession.completed_at) == d
-        ).scalar() or 0
-        
-        # 2. Daily Tasks Completed (Using real completed_at)
-        d_tasks = Todo.query.filter(
-            Todo.user_id == current_user.id,
-            Todo.completed == True,
-            db.func.date(Todo.completed_at) == d
-        ).count()
-        
-        # 3. Daily Goals (High Priority Completed)
-        d_goals = Todo.query.filter(
-            Todo.user_id == current_user.id,
-            Todo.completed == True,
-            Todo.priority == 'high',
-            db.func.date(Todo.completed_at) == d
-        ).count()
-        
-        total_focus_week += d_focus
-        total_tasks_week += d_tasks
-        total_goals_week += d_goals
-        
+        key = d.isoformat()
+        d_focus = focus_by_day.get(key, 0)
+        d_tasks = tasks_by_day.get(key, 0)
+
         # Normalize for chart (Max 4 hours focus = 100%, Max 5 tasks = 100%)
         focus_pct = min((d_focus / 240) * 100, 100) # 4 hours max bar
         task_pct = min((d_tasks / 5) * 100, 100)    # 5 tasks max bar
@@ -2880,29 +4319,31 @@ def dashboard():
         )
     ).order_by(Event.date.asc(), Event.time.asc()).first()
 
-    # High priority uncompleted task
-    important_todo = Todo.query.filter_by(
-        user_id=current_user.id,
-        completed=False,
-        priority='high'
-    ).order_by(Todo.id.desc()).first()
+    # High priority uncompleted task, falling back to the next due task —
+    # one ranked query instead of a query plus a conditional fallback query.
+    # Rank 0 = high priority (newest first, like the old query); rank 1 =
+    # upcoming by due date. The CASE ordering key only kicks in for rank-1
+    # rows, where due_date is always non-NULL.
+    todo_rank = case((Todo.priority == 'high', 0), else_=1)
+    important_todo = Todo.query.filter(
+        Todo.user_id == current_user.id,
+        ~Todo.completed,
+        db.or_(
+            Todo.priority == 'high',
+            db.and_(Todo.due_date != None, Todo.due_date >= today_str)
+        )
+    ).order_by(
+        todo_rank.asc(),
+        case((todo_rank == 1, Todo.due_date)).asc(),
+        Todo.id.desc()
+    ).first()
 
     important_todo_label = "High Priority Task"
-    
-    # Fallback: If no high priority task, show next due task
-    if not important_todo:
-        important_todo = Todo.query.filter(
-            Todo.user_id == current_user.id,
-            Todo.completed == False,
-            Todo.due_date != None,
-            Todo.due_date >= today_str
-        ).order_by(Todo.due_date.asc()).first()
-        
-        if important_todo:
-            important_todo_label = "Upcoming Task"
-             
+    if important_todo is not None and important_todo.priority != 'high':
+        important_todo_label = "Upcoming Task"
 
-    return render_template(
+
+    page = render_template(
         'dashboard.html',
         total_todos=total_todos,
         completed_todos=completed_todos,
@@ -2927,6 +4368,12 @@ def dashboard():
         important_todo=important_todo,
         important_todo_label=important_todo_label
     )
+    if can_cache and not session.get('_flashes'):
+        try:
+            redis_client.setex(_dash_cache_key(current_user.id), _DASH_CACHE_TTL, page)
+        except Exception:
+            pass
+    return page
 
 @app.route('/chat')
 @login_required
@@ -2946,19 +4393,30 @@ def chat_send():
         if not content:
             return jsonify({'status': 'error', 'message': 'Empty message'}), 400
             
-        # Store user message
+        # Store user message — flushed, not committed, so the history query
+        # inside generate_chat_response already sees it while both messages
+        # still share a single commit (one fsync per chat turn, not two)
         user_msg = ChatMessage(user_id=current_user.id, role='user', content=content, is_group=False)
         db.session.add(user_msg)
-        db.session.commit()
+        db.session.flush()
+
+        try:
+            # Generate AI response (Context Aware). The LLM round-trip stays
+            # inline deliberately: under the eventlet worker the monkey-
+            # patched socket yields while waiting, so other requests keep
+            # flowing, and the AJAX contract returns the reply in this same
+            # response — queue-based offload would need a separate worker
+            # process plus a push/polling frontend this deployment lacks.
+            reply = ChatService.generate_chat_response(current_user, content)
+
+            # Store AI response
+            ai_msg = ChatMessage(user_id=current_user.id, role='assistant', content=reply, is_group=False)
+            db.session.add(ai_msg)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
 
-        # Generate AI response (Context Aware)
-        reply = ChatService.generate_chat_response(current_user, content)
-        
-        # Store AI response
-        ai_msg = ChatMessage(user_id=current_user.id, role='assistant', content=reply, is_group=False)
-        db.session.add(ai_msg)
-        db.session.commit()
-        
         # Return response with IST timestamps
         return jsonify({
             'status': 'success',
@@ -2973,16 +4431,18 @@ def chat_send():
     if not content:
         return redirect(url_for('chat'))
 
-    # Store user message
+    # Store user message (flush only; one commit covers the whole turn)
     db.session.add(ChatMessage(user_id=current_user.id, role='user', content=content, is_group=False))
-    db.session.commit()
-
-    db.session.commit()
+    db.session.flush()
 
-    # Generate AI response
-    reply = ChatService.personal_reply(current_user, content)
-    db.session.add(ChatMessage(user_id=current_user.id, role='assistant', content=reply, is_group=False))
-    db.session.commit()
+    try:
+        # Generate AI response
+        reply = ChatService.personal_reply(current_user, content)
+        db.session.add(ChatMessage(user_id=current_user.id, role='assistant', content=reply, is_group=False))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
     return redirect(url_for('chat'))
 
@@ -3073,6 +4533,11 @@ class UserItem(db.Model):
     purchased_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=False) # For themes/frames that need activation
 
+    # Frame/theme lookups filter on (user_id, is_active) on every render
+    __table_args__ = (
+        db.Index('ix_useritem_user_active', 'user_id', 'is_active'),
+    )
+
 class ActivePowerUp(db.Model):
     """Track active power-ups with duration and effects"""
     id = db.Column(db.Integer, primary_key=True)
@@ -3082,7 +4547,13 @@ class ActivePowerUp(db.Model):
     expires_at = db.Column(db.DateTime, nullable=True)  # None for instant effects
     multiplier = db.Column(db.Float, default=1.0)  # For XP/time multipliers
     is_active = db.Column(db.Boolean, default=True)
-    
+
+    # add_xp filters on (user_id, is_active) for every XP event
+    __table_args__ = (
+        db.Index('ix_powerup_user_active', 'user_id', 'is_active'),
+    )
+
+
     def is_expired(self):
         """Check if power-up has expired"""
         if self.expires_at is None:
@@ -3187,6 +4658,42 @@ class ShopService:
         }
     }
 
+    # Precomputed at import: item_id -> frame color. Hot paths (avatar frame
+    # rendering) resolve a frame in one dict lookup instead of
+    # ITEMS.get() + type check + color get per item.
+    FRAME_COLORS = {
+        iid: item['color'] for iid, item in ITEMS.items()
+        if item.get('type') == 'frame'
+    }
+
+    # Effect classification, also precomputed at import: the add_xp power-up
+    # scan probes one frozenset per row instead of doing ITEMS.get() +
+    # .get('effect') + string comparisons. Rows referencing ids the catalog
+    # no longer lists fall through unclassified, exactly as the dict-get
+    # version skipped them.
+    XP_BOOST_IDS = frozenset(
+        iid for iid, item in ITEMS.items()
+        if item.get('effect') in ('xp_multiplier', 'mega_xp_multiplier')
+    )
+    TIME_BOOST_IDS = frozenset(
+        iid for iid, item in ITEMS.items()
+        if item.get('effect') == 'time_multiplier'
+    )
+    PROTECTION_IDS = frozenset(
+        iid for iid, item in ITEMS.items()
+        if item.get('effect') == 'xp_protection'
+    )
+
+    # Equippable ids by type: equip_item deactivates same-type items with a
+    # single UPDATE ... WHERE item_id IN (...) instead of loading every
+    # active row and probing the catalog per row
+    THEME_IDS = frozenset(
+        iid for iid, item in ITEMS.items() if item.get('type') == 'theme'
+    )
+    FRAME_IDS = frozenset(
+        iid for iid, item in ITEMS.items() if item.get('type') == 'frame'
+    )
+
     @staticmethod
     def buy_item(user: User, item_id: str):
         item = ShopService.ITEMS.get(item_id)
@@ -3277,47 +4784,27 @@ class ShopService:
 
         # Handle Equipping based on type
         if item['type'] == 'theme':
-            # Unequip other themes
-            current_active = (
-                db.session.query(UserItem)
-                .filter(UserItem.user_id == user.id, UserItem.is_active == True)
-                .all()
-            )
-            
-            # Deactivate other themes
-            for active_item in current_active:
-                # check if it's a theme by looking up the ID in ITEMS (simplified)
-                # In real app, we'd store type in DB or join with Item table.
-                # Here we check the hardcoded catalog.
-                cat_item = ShopService.ITEMS.get(active_item.item_id)
-                if cat_item and cat_item['type'] == 'theme':
-                    active_item.is_active = False
-            
-            # Activate new
-            owned.is_active = True
-            db.session.commit()
-            return {'status': 'success', 'message': f"Equipped {item['name']}!"}
-
-        if item['type'] == 'frame':
-            # Unequip other frames
-            current_active = (
-                db.session.query(UserItem)
-                .filter(UserItem.user_id == user.id, UserItem.is_active == True)
-                .all()
-            )
-            
-            # Deactivate other frames
-            for active_item in current_active:
-                cat_item = ShopService.ITEMS.get(active_item.item_id)
-                if cat_item and cat_item['type'] == 'frame':
-                    active_item.is_active = False
-            
-            # Activate new
-            owned.is_active = True
-            db.session.commit()
-            return {'status': 'success', 'message': f"Equipped {item['name']}!"}
-
-        return {'status': 'error', 'message': 'This item cannot be equipped.'}
+            same_type_ids = ShopService.THEME_IDS
+        elif item['type'] == 'frame':
+            same_type_ids = ShopService.FRAME_IDS
+        else:
+            return {'status': 'error', 'message': 'This item cannot be equipped.'}
+
+        # Deactivate every other item of the same type in one UPDATE
+        # (no row loads, no per-row catalog probing), then activate the
+        # new one and commit both together. `owned` must be excluded: the
+        # bulk UPDATE bypasses the session, so flipping its row here would
+        # leave the in-memory object stale and the reassignment below a
+        # no-op on re-equip
+        UserItem.query.filter(
+            UserItem.user_id == user.id,
+            UserItem.id != owned.id,
+            UserItem.item_id.in_(same_type_ids),
+            UserItem.is_active
+        ).update({'is_active': False}, synchronize_session=False)
+        owned.is_active = True
+        db.session.commit()
+        return {'status': 'success', 'message': f"Equipped {item['name']}!"}
 
 
 @app.route('/shop')
@@ -3375,29 +4862,31 @@ def group_chat():
         messages = (
             GroupChatMessage.query
             .filter_by(group_id=group.id)
+            # Batch senders in one IN query and load only what the chat
+            # render needs from each
+            .options(selectinload(GroupChatMessage.user).load_only(
+                User.id, User.first_name, User.last_name, User.profile_image
+            ))
             .order_by(GroupChatMessage.created_at.asc())
             .limit(100)
             .all()
         )
-        # Join (DBMS concept): membership table join with user table
-        members = (
-            db.session.query(User)
+        # Join (DBMS concept): membership table join with user table,
+        # with the online flag (active within 5 minutes) computed as a SQL
+        # boolean column instead of a Python datetime subtraction per member.
+        # NULL last_seen compares as NULL → falsy → offline, as before.
+        online_threshold = datetime.utcnow() - timedelta(minutes=5)
+        member_rows = (
+            db.session.query(User, (User.last_seen >= online_threshold).label('is_online'))
             .join(GroupMember, GroupMember.user_id == User.id)
             .filter(GroupMember.group_id == group.id)
             .all()
         )
-        
-        # Attach online status (Active within last 5 minutes)
-        now = datetime.utcnow()
-
-        for m in members:
-            # If last_seen is None, assume offline.
-            # 5 minutes threshold
-            if m.last_seen and (now - m.last_seen).total_seconds() < 300:
-                m.is_online_status = True
-                online_count += 1
-            else:
-                m.is_online_status = False
+        members = []
+        for m, is_online in member_rows:
+            m.is_online_status = bool(is_online)
+            members.append(m)
+        online_count = sum(1 for m in members if m.is_online_status)
 
     return render_template('group_chat.html', group=group, group_messages=messages, group_members=members, online_count=online_count)
 
@@ -3475,6 +4964,11 @@ def get_group_messages(group_id):
         GroupChatMessage.query
         .filter(GroupChatMessage.group_id == group_id)
         .filter(GroupChatMessage.id > since_id)
+        # Batch senders in one IN query; the JSON below only reads
+        # name + avatar fields
+        .options(selectinload(GroupChatMessage.user).load_only(
+            User.id, User.first_name, User.last_name, User.profile_image
+        ))
         .order_by(GroupChatMessage.created_at.asc())
         .limit(50)
         .all()
@@ -3582,7 +5076,9 @@ def todos_add_batch():
 @app.context_processor
 def inject_gamification():
     if current_user.is_authenticated:
-        rank_info = GamificationService.get_rank(current_user.level)
+        # cached_property on the instance — current_user lives for the whole
+        # request, so every rank read in this request shares one lookup
+        rank_info = current_user.rank_info
         # XP to next level = 500 * level (simplified based on formula floor(total/500))
         # actually formula is level = floor(total/500) + 1
         # so next level at: level * 500
@@ -3592,7 +5088,7 @@ def inject_gamification():
         # Get active theme
         active_theme_item = (
             db.session.query(UserItem)
-            .filter_by(user_id=current_user.id, is_active=True)
+            .filter(UserItem.user_id == current_user.id, UserItem.is_active)
             .all()
         )
         
@@ -3691,19 +5187,14 @@ def todos_delete(todo_id):
 @app.route('/todos/undo', methods=['POST'])
 @login_required
 def todos_undo():
-    undo_stack = Stack()
-    for item in session.get('todo_undo_stack', []):
-        undo_stack.push(item)
-
-    last = undo_stack.pop()
-    if last is None:
+    # The session list already is the LIFO stack — pop the newest entry
+    undo_stack = list(session.get('todo_undo_stack', []))
+    if not undo_stack:
         return redirect(url_for('todos'))
+    last = undo_stack.pop()
 
     # Write the updated stack back to session
-    remaining = []
-    while not undo_stack.is_empty():
-        remaining.append(undo_stack.pop())
-    session['todo_undo_stack'] = list(reversed(remaining))
+    session['todo_undo_stack'] = undo_stack
 
     db.session.add(Todo(
         user_id=current_user.id,
@@ -3741,10 +5232,10 @@ def pomodoro_save_session():
         # Award XP: 1 XP per minute of focus
         if mode == 'focus':
             # Check for Double Time power-up to adjust stored duration
-            active_time_boost = ActivePowerUp.query.filter_by(
-                user_id=current_user.id, 
-                power_up_id='double_time',
-                is_active=True
+            active_time_boost = ActivePowerUp.query.filter(
+                ActivePowerUp.user_id == current_user.id,
+                ActivePowerUp.power_up_id == 'double_time',
+                ActivePowerUp.is_active
             ).first()
             
             if active_time_boost and not active_time_boost.is_expired():
@@ -4001,7 +5492,8 @@ def syllabus_restore(doc_id):
     # Update its created_at to now to make it 'current'
     doc.created_at = datetime.utcnow()
     db.session.commit()
-    
+    ChatService.invalidate_syllabus_cache(current_user.id)
+
     flash(f'Restored {doc.filename} as active syllabus.', 'success')
     return redirect(url_for('syllabus'))
 
@@ -4342,9 +5834,21 @@ def leaderboard():
     top_users = (
         User.query
         .filter(
-            User.is_public_profile == True,
-            User.is_admin == False,
-            User.is_banned == False
+            User.is_public_profile,
+            ~User.is_admin,
+            ~User.is_banned
+        )
+        # Batch-load equipped items for all 50 rows in one IN query —
+        # avatar frames otherwise trigger a SELECT per rendered user.
+        # load_only trims the row to what the template renders; the wide
+        # Text columns (about_me, cover_image, ban_reason) stay unloaded.
+        .options(
+            selectinload(User.active_items),
+            load_only(
+                User.id, User.first_name, User.last_name, User.level,
+                User.total_xp, User.profile_image, User.is_public_profile,
+                User.rank_name_col, User.rank_icon_col, User.rank_color_col
+            )
         )
         .order_by(User.level.desc(), User.total_xp.desc(), User.id.asc())
         .limit(50)
@@ -4367,9 +5871,9 @@ def leaderboard():
     # Rank is 1 + number of users who have more level OR same level but more XP
     # EXCLUDE ADMINS from rank calculation
     my_rank = User.query.filter(
-        User.is_public_profile == True,
-        User.is_admin == False,
-        User.is_banned == False,
+        User.is_public_profile,
+        ~User.is_admin,
+        ~User.is_banned,
         db.or_(
             User.level > current_user.level,
             db.and_(
@@ -4399,7 +5903,15 @@ def profile(user_id):
     GamificationService.check_badges(user)
     db.session.commit()
     
-    badges = UserBadge.query.filter_by(user_id=user.id).all()
+    # selectinload batches the badge details into one query — the template
+    # reads user_badge.badge.name/description per card, which otherwise
+    # lazy-loads one Badge row at a time
+    badges = (
+        UserBadge.query
+        .options(selectinload(UserBadge.badge))
+        .filter_by(user_id=user.id)
+        .all()
+    )
     # Calculate stats for the target user
     total_focus_minutes = db.session.query(db.func.sum(StudySession.duration))\
         .filter(StudySession.user_id == user.id).scalar() or 0
@@ -4416,7 +5928,7 @@ def profile(user_id):
 
     # Get Active Frame
     active_frame = None
-    active_items = UserItem.query.filter_by(user_id=user.id, is_active=True).all()
+    active_items = UserItem.query.filter(UserItem.user_id == user.id, UserItem.is_active).all()
     for u_item in active_items:
         cat_item = ShopService.ITEMS.get(u_item.item_id)
         if cat_item and cat_item['type'] == 'frame':
@@ -5042,14 +6554,16 @@ def judge_battle(room_code):
                 GamificationService.add_xp(winner_id, 'battle_win', base_xp)
                 result['xp_awarded'] = {winner_name: base_xp}
             elif winner_name == 'Draw':
-                # Both get 50%
+                # Both get 50%. Per-player add_xp on purpose: the bulk
+                # helper skips streak/badge updates, which matters here —
+                # a draw may be a player's only activity today — and two
+                # players gain nothing from batching
                 half_xp = int(base_xp * 0.5)
-                xp_dict = {}
                 for pid in room['players']:
                     GamificationService.add_xp(pid, 'battle_draw', half_xp)
-                    pname = room['players'][pid]['name']
-                    xp_dict[pname] = half_xp
-                result['xp_awarded'] = xp_dict
+                result['xp_awarded'] = {
+                    p['name']: half_xp for p in room['players'].values()
+                }
             
             socketio.emit('battle_result', result, room=room_code)
             
@@ -5195,8 +6709,9 @@ def inject_user_context():
         except Exception:
             pass # Fail gracefully if table doesn't exist yet
         
-        # 2. Sidebar Stats (Rank, Level Progress)
-        current_rank = GamificationService.get_rank(current_user.level)
+        # 2. Sidebar Stats (Rank, Level Progress) — reuse the per-request
+        # instance cache instead of recomputing from level
+        current_rank = current_user.rank_info
         # XP per level is 500 (from GamificationService)
         xp_per_level = 500
         current_xp_in_level = current_user.total_xp % xp_per_level
@@ -5499,7 +7014,7 @@ class MatchmakingService:
             User.id != user.id,
             ~User.id.in_(subq),
             ~User.id.in_(subq2),
-            User.is_public_profile == True
+            User.is_public_profile
         ).limit(50).all()
         
         matches = []
@@ -5825,6 +7340,27 @@ def init_db_schema():
                     if 'last_activity_date' not in columns:
                         print("Running migration: Adding last_activity_date to user table...")
                         conn.execute(text('ALTER TABLE "user" ADD COLUMN last_activity_date DATE'))
+                    if 'daily_focus_xp' not in columns:
+                        print("Running migration: Adding daily_focus_xp to user table...")
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN daily_focus_xp INTEGER DEFAULT 0'))
+                    if 'daily_focus_xp_date' not in columns:
+                        print("Running migration: Adding daily_focus_xp_date to user table...")
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN daily_focus_xp_date DATE'))
+                    if 'earned_badge_mask' not in columns:
+                        print("Running migration: Adding earned_badge_mask to user table...")
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN earned_badge_mask BIGINT DEFAULT 0'))
+                    if 'rank_name' not in columns:
+                        print("Running migration: Adding denormalized rank columns to user table...")
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN rank_name VARCHAR(20)'))
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN rank_icon VARCHAR(40)'))
+                        conn.execute(text('ALTER TABLE "user" ADD COLUMN rank_color VARCHAR(10)'))
+                        # Backfill existing rows, one UPDATE per rank tier
+                        for (min_lvl, max_lvl), (r_name, r_icon, r_color) in GamificationService.RANKS.items():
+                            conn.execute(
+                                text('UPDATE "user" SET rank_name = :n, rank_icon = :i, rank_color = :c '
+                                     'WHERE level >= :lo AND level <= :hi'),
+                                {'n': r_name, 'i': r_icon, 'c': r_color, 'lo': min_lvl, 'hi': max_lvl}
+                            )
                     
                 # 3. Check for Todo table updates
                 if 'todo' in inspector.get_table_names():
@@ -5852,6 +7388,102 @@ def init_db_schema():
                         print("Running migration: Adding extracted_text to syllabus_document table...")
                         conn.execute(text("ALTER TABLE syllabus_document ADD COLUMN extracted_text TEXT"))
                 
+                # 5. Performance indexes for existing databases
+                # (db.create_all only creates indexes on brand-new tables;
+                #  IF NOT EXISTS is supported by both SQLite and Postgres)
+                existing_tables = inspector.get_table_names()
+                if 'xp_history' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_xph_user_source_ts_amount '
+                        'ON xp_history (user_id, source, timestamp, amount)'
+                    ))
+                if 'user' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_user_name_lower '
+                        'ON "user" (lower(first_name), lower(last_name))'
+                    ))
+                if 'friendship' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_friend_user_status '
+                        'ON friendship (user_id, status)'
+                    ))
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_friend_friend_status '
+                        'ON friendship (friend_id, status)'
+                    ))
+                if 'support_ticket' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_ticket_user_unread '
+                        'ON support_ticket (user_id, user_unread_count)'
+                    ))
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_ticket_admin_unread '
+                        'ON support_ticket (status) WHERE admin_unread_count > 0 '
+                        "AND status IN ('open', 'in_progress')"
+                    ))
+                if 'todo' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_todo_user_category '
+                        'ON todo (user_id, category)'
+                    ))
+                if 'event' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_event_user_date '
+                        'ON event (user_id, date)'
+                    ))
+                # 5b. Seed the user_daily_stat rollup on first boot with it:
+                # replay the recent session/todo history so existing users'
+                # weekly charts aren't blank until new activity arrives.
+                # (Both SQLite and Postgres support this upsert syntax.)
+                if 'user_daily_stat' in inspector.get_table_names():
+                    if conn.execute(text('SELECT 1 FROM user_daily_stat LIMIT 1')).first() is None:
+                        cutoff = datetime.utcnow() - timedelta(days=14)
+                        conn.execute(text(
+                            'INSERT INTO user_daily_stat '
+                            '(user_id, date, focus_mins, tasks_completed, goals_completed) '
+                            'SELECT user_id, date(completed_at), SUM(duration), 0, 0 '
+                            'FROM study_session WHERE completed_at >= :cutoff '
+                            'GROUP BY user_id, date(completed_at)'
+                        ), {'cutoff': cutoff})
+                        conn.execute(text(
+                            'INSERT INTO user_daily_stat '
+                            '(user_id, date, focus_mins, tasks_completed, goals_completed) '
+                            'SELECT user_id, date(completed_at), 0, COUNT(*), '
+                            "SUM(CASE WHEN priority = 'high' THEN 1 ELSE 0 END) "
+                            'FROM todo WHERE completed AND completed_at >= :cutoff '
+                            'GROUP BY user_id, date(completed_at) '
+                            'ON CONFLICT (user_id, date) DO UPDATE SET '
+                            'tasks_completed = excluded.tasks_completed, '
+                            'goals_completed = excluded.goals_completed'
+                        ), {'cutoff': cutoff})
+                if 'group_member' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_member_user_joined '
+                        'ON group_member (user_id, joined_at)'
+                    ))
+                if 'user_item' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_useritem_user_active '
+                        'ON user_item (user_id, is_active)'
+                    ))
+                if 'active_power_up' in existing_tables:
+                    conn.execute(text(
+                        'CREATE INDEX IF NOT EXISTS ix_powerup_user_active '
+                        'ON active_power_up (user_id, is_active)'
+                    ))
+                if 'user_badge' in existing_tables:
+                    # Dedupe before enforcing uniqueness (older code could
+                    # double-award under races), then back the constraint
+                    # with a unique index
+                    conn.execute(text(
+                        'DELETE FROM user_badge WHERE id NOT IN '
+                        '(SELECT MIN(id) FROM user_badge GROUP BY user_id, badge_id)'
+                    ))
+                    conn.execute(text(
+                        'CREATE UNIQUE INDEX IF NOT EXISTS uq_user_badge '
+                        'ON user_badge (user_id, badge_id)'
+                    ))
+
                 # 4. Create Habit tables if missing (Standard approach)
                 # Since we use db.create_all() at startup, this is mainly for verification or alter
                 if 'habit' not in inspector.get_table_names():
@@ -5891,8 +7523,8 @@ def check_task_reminders():
                 # Query all un-notified tasks due today
                 upcoming_tasks = Todo.query.filter(
                     Todo.due_date == current_date_str,
-                    Todo.completed == False,
-                    Todo.is_notified == False
+                    ~Todo.completed,
+                    ~Todo.is_notified
                 ).all()
                 
                 for task in upcoming_tasks:
@@ -5945,6 +7577,8 @@ def check_task_reminders():
 
 # IMPORTANT: Order matters. Define logic, THEN run schema check and updates.
 init_db_schema()
+with app.app_context():
+    _seed_banned_set()
 
 @app.route('/fix-db-schema')
 def fix_db_schema():
@@ -5978,22 +7612,22 @@ def admin_dashboard():
     
     # 1. Total Users (excluding admins)
     total_users = User.query.filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     ).count()
     
     # 2. Active Users (excluding admins AND banned users)
     active_users = User.query.filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com',
-        User.is_banned == False
+        ~User.is_banned
     ).count()
     
     # 3. Total XP Awarded (from non-admin users)
     total_xp = db.session.query(db.func.sum(User.total_xp)).filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     ).scalar() or 0
@@ -6018,7 +7652,7 @@ def admin_dashboard():
     
     # Recent activity
     recent_users = User.query.filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     ).order_by(User.created_at.desc()).limit(5).all()
@@ -6043,7 +7677,7 @@ def admin_users():
     # Filter base query - exclude admins
     # Filter base query - exclude admins
     query = User.query.filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     )
@@ -6060,7 +7694,7 @@ def admin_users():
     if filter_type == 'active':
         query = query.filter(User.last_seen >= datetime.utcnow() - timedelta(days=7))
     elif filter_type == 'banned':
-        query = query.filter(User.is_banned == True)
+        query = query.filter(User.is_banned)
     
     users = query.order_by(User.created_at.desc()).paginate(page=page, per_page=20, error_out=False)
     
@@ -6074,17 +7708,21 @@ def admin_user_activity():
     # Define threshold for "offline"
     threshold = datetime.utcnow() - timedelta(minutes=ONLINE_THRESHOLD_MINUTES)
     
-    # Fetch actually online users (in set AND seen recently)
+    # Fetch actually online users (in tracker AND seen recently)
     active_users = []
-    if online_users:
+    online_ids = _online_user_ids()
+    if online_ids:
         active_users = User.query.filter(
-            User.id.in_(online_users), 
+            User.id.in_(online_ids),
             User.last_seen >= threshold,
-            User.is_admin == False
+            ~User.is_admin
         ).all()
-        # Prune stale IDs from set
+        # Prune stale IDs from the in-process tracker (Redis prunes itself
+        # inside _online_user_ids)
         active_ids = {u.id for u in active_users}
-        online_users.intersection_update(active_ids)
+        for uid in list(online_users):
+            if uid not in active_ids:
+                online_users.pop(uid, None)
         
     # Format current time to IST helper
     def format_ist(dt):
@@ -6103,7 +7741,7 @@ def admin_user_activity():
 
     # All regular users sorted by last_seen
     page = request.args.get('page', 1, type=int)
-    all_users = User.query.filter(User.is_admin == False).order_by(db.desc(User.last_seen)).paginate(page=page, per_page=30, error_out=False)
+    all_users = User.query.filter(~User.is_admin).order_by(db.desc(User.last_seen)).paginate(page=page, per_page=30, error_out=False)
     
     unread_support_count = SupportTicket.query.filter_by(status='open').count()
     
@@ -6330,13 +7968,18 @@ def admin_gamification():
     max_level = db.session.query(db.func.max(User.level)).scalar() or 0
     avg_level = db.session.query(db.func.avg(User.level)).scalar() or 0
     
-    # Top users by XP (excluding admins)
-    # Top users by XP (excluding admins)
-    top_users = User.query.filter(
-        User.is_admin == False,
-        User.email != 'admin@studyverse.com',
-        User.email != 'admin@studyversefinal.com'
-    ).order_by(User.total_xp.desc()).limit(10).all()
+    # Top users by XP (excluding admins) — Core rows + serialize_rows, no
+    # ORM object hydration for a read-only top-10 table
+    top_users = User.serialize_rows(db.session.execute(
+        select(
+            User.id, User.first_name, User.last_name, User.level,
+            User.total_xp, User.profile_image, User.is_public_profile
+        ).filter(
+            ~User.is_admin,
+            User.email != 'admin@studyverse.com',
+            User.email != 'admin@studyversefinal.com'
+        ).order_by(User.total_xp.desc()).limit(10)
+    ).all())
     
     # Recent XP transactions
     recent_xp = XPHistory.query.order_by(XPHistory.timestamp.desc()).limit(20).all()
@@ -6388,7 +8031,7 @@ def admin_shop():
     # Total purchases
     total_purchases = UserItem.query.count()
     unique_items = len(item_stats)
-    active_items = UserItem.query.filter_by(is_active=True).count()
+    active_items = UserItem.query.filter(UserItem.is_active).count()
     
     # Recent purchases
     recent_purchases = UserItem.query.order_by(UserItem.purchased_at.desc()).limit(20).all()
@@ -6431,7 +8074,7 @@ def admin_battles():
     top_studiers = db.session.query(
         User, func.sum(StudySession.duration).label('total_time')
     ).join(StudySession).filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     ).group_by(User.id).order_by(func.sum(StudySession.duration).desc()).limit(10).all()
@@ -6459,7 +8102,7 @@ def admin_analytics():
     
     # User growth (excluding admins to match total users)
     new_users_30d = User.query.filter(
-        User.is_admin == False,
+        ~User.is_admin,
         User.email != 'admin@studyverse.com',
         User.email != 'admin@studyversefinal.com'
     ).count()
@@ -6791,7 +8434,7 @@ Generate a structured learning breakdown in JSON format:
 
 Return ONLY valid JSON. No markdown, no extra text."""
 
-        model = genai.GenerativeModel(AI_MODEL)
+        model = _genai().GenerativeModel(AI_MODEL)
         resp = model.generate_content(prompt)
         raw = resp.text.strip()
         # Strip markdown code fences if present
@@ -6950,7 +8593,7 @@ def topic_resolver_diagram():
 
     try:
         # Try Gemini image generation model
-        image_model = genai.GenerativeModel('gemini-2.0-flash-preview-image-generation')
+        image_model = _genai().GenerativeModel('gemini-2.0-flash-preview-image-generation')
         image_prompt = (
             f"Create a clean, educational diagram or concept map for the topic: '{topic}'. "
             f"The diagram should be: labeled clearly, use arrows and boxes, show relationships, "
@@ -6979,7 +8622,7 @@ def topic_resolver_diagram():
         fallback_prompt = f"""Create a clear, structured text diagram or concept map for: "{topic}"
 Use ASCII art, arrows (→, ↓, ←, ↑), boxes (┌─┐ │ └─┘), and indentation to show relationships.
 Make it educational, concise, and visually clear. Max 30 lines."""
-        model = genai.GenerativeModel(AI_MODEL)
+        model = _genai().GenerativeModel(AI_MODEL)
         fb_resp = model.generate_content(fallback_prompt)
         return jsonify({'description': fb_resp.text.strip()})
     except Exception as fb_err:
@@ -7073,7 +8716,7 @@ IMPORTANT:
 - Be thorough with steps — explain each one clearly for a student.
 - Use simple, friendly language."""
 
-        model = genai.GenerativeModel(AI_MODEL)
+        model = _genai().GenerativeModel(AI_MODEL)
         response = model.generate_content(
             contents=[
                 {'role': 'user', 'parts': [
@@ -8200,7 +9843,13 @@ def admin_feedback():
     category = request.args.get('category', '')
     rating   = request.args.get('rating', '')
 
-    query = UserFeedback.query.order_by(UserFeedback.created_at.desc())
+    # Eager-load the author in the same pass — the list template shows
+    # fb.user name/email/avatar for up to 100 rows
+    query = (
+        UserFeedback.query
+        .options(selectinload(UserFeedback.user))
+        .order_by(UserFeedback.created_at.desc())
+    )
     if category:
         query = query.filter_by(category=category)
     if rating: